@@ -136,7 +136,7 @@ A: Training is resumable. The next run will use whatever model exists
    and continue from there.
 
 Q: Can I train with fewer images?
-A: Yes! Edit train_model.py and change SAMPLE_SIZE = 5000 to a lower number.
+A: Yes! Edit train_model.py and lower SAMPLE_SIZE (default 20000).
    Fewer images = faster training, but less accuracy.
 
 Q: How accurate will it be?
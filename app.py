@@ -17,14 +17,20 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
 
 # Try to import project modules
 try:
-    from data_loader import IMAGES_DIR
+    from data_loader import get_dataset_config
     from meal_predictor import get_recognizer, predict_meal
-    import tensorflow as tf
 except ImportError as e:
     st.error(f"Error importing modules: {e}")
     st.info("Make sure to install dependencies: pip install -r requirements.txt")
     st.stop()
 
+def get_images_dir():
+    """Dataset image folder (resolved on first use), or None if no dataset is configured"""
+    try:
+        return get_dataset_config().images_dir
+    except FileNotFoundError:
+        return None
+
 # --- PAGE CONFIGURATION ---
 st.set_page_config(
     page_title="Food-IA | Meal Analyzer",
@@ -149,8 +155,9 @@ with tab1:
         
         if image_source == "📁 Depuis le dossier Food Images":
             # List available images
-            if os.path.isdir(IMAGES_DIR):
-                image_files = [f for f in os.listdir(IMAGES_DIR) 
+            images_dir = get_images_dir()
+            if images_dir and os.path.isdir(images_dir):
+                image_files = [f for f in os.listdir(images_dir) 
                              if f.lower().endswith(('.jpg', '.jpeg', '.png'))]
                 
                 if image_files:
@@ -159,12 +166,12 @@ with tab1:
                         image_files,
                         index=0
                     )
-                    image_path = os.path.join(IMAGES_DIR, selected_image)
+                    image_path = os.path.join(images_dir, selected_image)
                     uploaded_image = cv2.imread(image_path)
                 else:
                     st.warning("⚠️ Aucune image trouvée dans le dossier Food Images")
             else:
-                st.error(f"❌ Le dossier {IMAGES_DIR} n'existe pas")
+                st.error(f"❌ Le dossier {images_dir or 'Food Images'} n'existe pas")
         
         else:
             # Upload image
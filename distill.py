@@ -0,0 +1,211 @@
+#!/usr/bin/env python
+"""
+Food-IA: Distil the trained model into the small create_food_cnn student
+The trained MobileNetV2 model (teacher) predicts the class probabilities of
+every image once; they are cached on disk per teacher file. The 128x128
+student CNN then learns from these soft targets and the true labels on the
+teacher's own train/validation/test split (from its training checkpoint), and
+is saved next to the full model for FoodRecognizer:
+
+    python train_model.py
+    python distill.py
+    FOOD_IA_MODEL=student streamlit run app.py
+"""
+
+import os
+import sys
+import time
+import pickle
+import hashlib
+import argparse
+import numpy as np
+
+import train_model as tm
+import tf_keras
+from food_model import create_food_cnn
+from image_cache import SoftTargetCache
+import model_bundle
+from meal_predictor import STUDENT_MODEL_PATH, STUDENT_CLASSES_PATH
+
+tf = tm.tf
+
+STUDENT_SIZE = (128, 128)  # Input size of create_food_cnn
+TEMPERATURE = 4.0  # Softens both distributions so the student also learns which dishes look alike
+HARD_LABEL_WEIGHT = 0.3  # Share of the loss on the true labels (the rest on the soft targets)
+STUDENT_EPOCHS = 30
+STUDENT_LEARNING_RATE = 1e-3
+
+
+def teacher_id(model_path):
+    """Short content hash of the teacher file: soft targets are cached per teacher"""
+    digest = hashlib.sha1()
+    with open(model_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()[:12]
+
+
+def distillation_loss(temperature=TEMPERATURE, hard_weight=HARD_LABEL_WEIGHT):
+    """
+    Loss for y_true = [true label, teacher probabilities...] and the student's
+    softmax output: cross-entropy on the label plus the KL divergence to the
+    teacher at the given temperature (scaled by T^2 to keep its gradients
+    comparable).
+    """
+    def loss(y_true, y_pred):
+        labels = tf.cast(y_true[:, 0], tf.int32)
+        hard = tf_keras.losses.sparse_categorical_crossentropy(labels, y_pred)
+        # log p / T gives the same softmax as logits / T
+        log_student = tf.nn.log_softmax(tf.math.log(y_pred + 1e-7) / temperature)
+        log_teacher = tf.nn.log_softmax(tf.math.log(y_true[:, 1:] + 1e-7) / temperature)
+        soft = tf.reduce_sum(tf.exp(log_teacher) * (log_teacher - log_student), axis=-1)
+        return hard_weight * hard + (1 - hard_weight) * soft * temperature ** 2
+    return loss
+
+
+def label_accuracy(y_true, y_pred):
+    """Accuracy against the true label column of the distillation targets"""
+    labels = tf.cast(y_true[:, 0], tf.int64)
+    return tf.cast(tf.equal(labels, tf.argmax(y_pred, axis=-1)), tf.float32)
+
+
+def latency_ms(model, image_size, runs=20):
+    """Median wall time of a single-image forward pass"""
+    x = tf.zeros((1, image_size[1], image_size[0], 3))
+    model(x, training=False)
+    times = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        model(x, training=False)
+        times.append(time.perf_counter() - started)
+    return float(np.median(times)) * 1000
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Distil the trained Food-IA model into the small student CNN")
+    parser.add_argument('--epochs', type=int, default=STUDENT_EPOCHS, help=f"Student epochs (default {STUDENT_EPOCHS})")
+    parser.add_argument('--temperature', type=float, default=TEMPERATURE,
+                        help=f"Softmax temperature of the soft targets (default {TEMPERATURE})")
+    parser.add_argument('--hard-weight', type=float, default=HARD_LABEL_WEIGHT,
+                        help=f"Weight of the true-label loss, 0-1 (default {HARD_LABEL_WEIGHT})")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Distillation pipeline"""
+    args = parse_args(argv)
+
+    print("╔════════════════════════════════════════════════════════════════╗")
+    print("║        🍽️  FOOD-IA: Distil the Student Model                 ║")
+    print("╚════════════════════════════════════════════════════════════════╝")
+
+    if not os.path.exists(tm.MODEL_PATH) or not os.path.exists(tm.ENCODER_PATH):
+        print(f"\n❌ No trained model in {tm.MODEL_DIR}: run python train_model.py first")
+        return 1
+    teacher = tm.keras.models.load_model(tm.MODEL_PATH)
+    with open(tm.ENCODER_PATH, 'rb') as f:
+        le = pickle.load(f)
+    classes = le.classes_
+    print(f"\n👩‍🏫 Teacher: {tm.MODEL_PATH} ({len(classes)} classes)")
+
+    tm.create_model_directory()
+    # The teacher's own split: a fresh one would put its training images in the student's test set
+    saved = tm.load_saved_splits(classes)
+    if saved is None:
+        print(f"\n❌ No saved split of the teacher in {tm.CHECKPOINT_DIR} (the checkpoint is missing, "
+              "unfinished, from a --records run or an older version): retrain it with python train_model.py")
+        return 1
+    data_df, splits = saved
+    paths = data_df['path'].to_numpy()
+
+    print(f"\n🔮 Teacher soft targets...")
+    cache = SoftTargetCache(teacher_id(tm.MODEL_PATH), len(classes))
+    targets, ok = tm.predict_cached(paths, teacher, cache, name='Soft targets', phase='soft_targets')
+
+    # Student-size images of the rows the teacher could read; rows failing either are left out
+    print("\n🖼️  Loading images into memory...")
+    rows = np.flatnonzero(ok)
+    X, decoded = tm.decode_images(paths[rows].tolist(), image_size=STUDENT_SIZE)
+    if not decoded.any():
+        print("\n❌ Distillation failed: Could not load images")
+        return 1
+    rows = rows[decoded]
+    X = tm.compact_rows(X, decoded)
+    targets = targets[rows]
+    y_enc = le.transform(data_df['label'].to_numpy()[rows])
+
+    # Split indices are data_df rows: map them to rows of X
+    position = np.full(len(data_df), -1)
+    position[rows] = np.arange(len(rows))
+    train_idx, val_idx, test_idx = (position[idx][position[idx] >= 0] for idx in
+                                    (splits['train'], splits['val'], splits['test']))
+    print(f"\n✂️  Teacher's split:")
+    print(f"   Training set: {len(train_idx)} images")
+    print(f"   Validation set: {len(val_idx)} images")
+    print(f"   Test set: {len(test_idx)} images")
+    if not (len(train_idx) and len(val_idx) and len(test_idx)):
+        print("\n❌ Distillation failed: a split of the teacher has no readable images left")
+        return 1
+
+    # Each target row: true label, then the teacher probabilities
+    y_distill = np.concatenate([y_enc[:, None].astype('float32'), targets], axis=1)
+
+    print(f"\n🎓 Training student (T={args.temperature}, true-label weight {args.hard_weight})...")
+    student = create_food_cnn(len(classes))
+    student.compile(
+        optimizer=tf_keras.optimizers.Adam(STUDENT_LEARNING_RATE),
+        loss=distillation_loss(args.temperature, args.hard_weight),
+        metrics=[label_accuracy]
+    )
+    print(f"   Student parameters: {student.count_params():,} (teacher {teacher.count_params():,})")
+    callbacks = [
+        tf_keras.callbacks.EarlyStopping(monitor='val_loss', patience=4, restore_best_weights=True),
+        tf_keras.callbacks.ReduceLROnPlateau(monitor='val_loss', factor=0.5, patience=2, min_lr=1e-6),
+        # Epoch-keyed shuffle of the training pipeline, as a tf_keras callback for the tf_keras student
+        tf_keras.callbacks.LambdaCallback(on_epoch_begin=lambda epoch, logs: tm.epoch_order().epoch.assign(epoch)),
+    ]
+    with tm.telemetry.phase('train_student'):
+        student.fit(
+            tm.make_array_dataset(X, y_distill, train_idx, training=True),
+            epochs=args.epochs,
+            validation_data=tm.make_array_dataset(X, y_distill, val_idx),
+            callbacks=callbacks,
+            verbose=1
+        )
+
+    print("\n📊 Evaluating on the test set...")
+    # Batches are gathered in sorted row order: sort first so predictions line up
+    test_idx = np.sort(test_idx)
+    student_probs = student.predict(tm.make_array_dataset(X, y_distill, test_idx), verbose=0)
+    student_pred = student_probs.argmax(axis=1)
+    teacher_pred = targets[test_idx].argmax(axis=1)
+    accuracy = float(np.mean(student_pred == y_enc[test_idx]))
+    agreement = float(np.mean(student_pred == teacher_pred))
+    print(f"   Teacher accuracy: {np.mean(teacher_pred == y_enc[test_idx]) * 100:.2f}%")
+    print(f"   Student accuracy: {accuracy * 100:.2f}%")
+    print(f"   Student agrees with teacher: {agreement * 100:.2f}%")
+    teacher_ms = latency_ms(teacher, tm.IMAGE_SIZE)
+    student_ms = latency_ms(student, STUDENT_SIZE)
+    print(f"   Latency (1 image): teacher {teacher_ms:.1f} ms, student {student_ms:.1f} ms "
+          f"({teacher_ms / max(student_ms, 1e-9):.1f}x faster)")
+
+    # Plain loss in the saved file so it loads without the distillation code
+    student.compile(optimizer='adam', loss='sparse_categorical_crossentropy', metrics=['accuracy'])
+    student.save(STUDENT_MODEL_PATH)
+    with open(STUDENT_CLASSES_PATH, 'wb') as f:
+        pickle.dump(list(classes), f)
+    bundle = model_bundle.write_bundle({'keras': STUDENT_MODEL_PATH}, classes, STUDENT_SIZE, name='student', metadata={
+        'teacher': teacher_id(tm.MODEL_PATH),
+        'temperature': args.temperature,
+        'hard_weight': args.hard_weight,
+        'test_accuracy': accuracy,
+        'teacher_agreement': agreement,
+    })
+    print(f"\n💾 Student saved: {STUDENT_MODEL_PATH} (+ {STUDENT_CLASSES_PATH})")
+    print(f"   Model bundle: {bundle}")
+    print(f"   Use it in the app with: FOOD_IA_MODEL=student")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
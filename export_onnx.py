@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+"""
+Food-IA: Export the trained model to ONNX for ONNX Runtime
+A serving process that uses the ONNX model only needs the onnxruntime
+package: it starts faster and uses less memory than one that imports
+TensorFlow. Needs tf2onnx for the export (pip install tf2onnx onnxruntime):
+
+    python export_onnx.py               # models/food_model.onnx
+    python export_onnx.py --student     # models/food_student.onnx
+    FOOD_IA_BACKEND=onnx streamlit run app.py
+"""
+
+import os
+import sys
+import time
+import argparse
+import numpy as np
+
+import train_model as tm
+import model_bundle
+from inference_backends import ONNXBackend
+from meal_predictor import ONNX_MODEL_PATH, STUDENT_MODEL_PATH, STUDENT_ONNX_MODEL_PATH
+
+tf = tm.tf
+
+
+def export_onnx(model, out_path, image_size):
+    """Write the model as ONNX (any batch size, float32 images in [0, 1])"""
+    signature = tf.TensorSpec([None, image_size[1], image_size[0], 3], tf.float32, name='image')
+    model.export(out_path, format='onnx', input_signature=[signature], verbose=False)
+
+
+def latency_ms(predict, image, runs=20):
+    """Median wall time of a single-image prediction"""
+    predict(image)
+    times = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        predict(image)
+        times.append(time.perf_counter() - started)
+    return float(np.median(times)) * 1000
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Export the trained Food-IA model to ONNX")
+    parser.add_argument('--student', action='store_true', help="Export the distilled student (distill.py) instead")
+    parser.add_argument('--out', help="Output file (default next to the model)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Export pipeline"""
+    args = parse_args(argv)
+
+    print("╔════════════════════════════════════════════════════════════════╗")
+    print("║        🍽️  FOOD-IA: Export ONNX Model                        ║")
+    print("╚════════════════════════════════════════════════════════════════╝")
+
+    model_path, out_path = (STUDENT_MODEL_PATH, STUDENT_ONNX_MODEL_PATH) if args.student else \
+        (tm.MODEL_PATH, ONNX_MODEL_PATH)
+    out_path = args.out or out_path
+    if not os.path.exists(model_path):
+        print(f"\n❌ No trained model at {model_path}")
+        return 1
+    model = tm.keras.models.load_model(model_path)
+    height, width = model.input_shape[1:3]
+    image_size = (width, height) if height and width else tm.IMAGE_SIZE
+    print(f"\n📥 Model: {model_path} (exported for {image_size[0]}x{image_size[1]} input)")
+
+    print(f"\n📤 Converting to ONNX...")
+    try:
+        export_onnx(model, out_path, image_size)
+    except ImportError as e:
+        print(f"\n❌ Export failed: {e}")
+        print("   Install the converter with: pip install tf2onnx onnxruntime")
+        return 1
+    print(f"   ✅ Saved: {out_path} ({os.path.getsize(out_path) / 1024 ** 2:.1f} MB)")
+    bundle = model_bundle.attach_export('student' if args.student else 'full', model_path, out_path, 'onnx')
+    if bundle:
+        print(f"   Added to model bundle: {bundle}")
+
+    # Same outputs (up to float rounding) on a random batch
+    backend = ONNXBackend(out_path)
+    batch = np.random.default_rng(tm.RANDOM_STATE).random((8, image_size[1], image_size[0], 3), dtype=np.float32)
+    difference = np.abs(backend.predict(batch) - model.predict(batch, verbose=0)).max()
+    print(f"   Max difference to the Keras model: {difference:.2e}")
+    original_ms = latency_ms(lambda x: model(x, training=False), batch[:1])
+    onnx_ms = latency_ms(backend.predict, batch[:1])
+    print(f"   Latency (1 image): {original_ms:.1f} ms -> {onnx_ms:.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+"""
+Food-IA: Export the trained model with its preprocessing inside
+The exported model takes raw BGR uint8 images of any size: the resize to the
+training size and the rescaling to [0, 1] are layers of the graph, so the
+app no longer makes a resized float32 copy of every image in NumPy and a
+batch is preprocessed on TensorFlow's (or ONNX Runtime's) thread pool:
+
+    python export_raw_input.py                  # models/food_model_raw.keras
+    python export_raw_input.py --onnx           # + models/food_model_raw.onnx
+    python export_raw_input.py --student        # the distilled student
+    FOOD_IA_RAW_INPUT=1 streamlit run app.py
+
+The exports are added to the model's LATEST bundle (checksummed like the other
+backends) when that bundle holds the model they were made from.
+"""
+
+import os
+import sys
+import time
+import argparse
+import numpy as np
+import cv2
+
+import train_model as tm
+import model_bundle
+from inference_backends import KerasBackend, ONNXBackend
+from meal_predictor import (RAW_MODEL_PATH, RAW_ONNX_MODEL_PATH, STUDENT_MODEL_PATH, STUDENT_RAW_MODEL_PATH,
+                            STUDENT_RAW_ONNX_MODEL_PATH)
+
+tf = tm.tf
+
+CHECK_SIZE = (1024, 768)  # Size (width, height) of the test images: a typical phone photo after JPEG reduction
+
+
+def latency_ms(predict, image, runs=20):
+    """Median wall time of a single-image prediction"""
+    predict(image)
+    times = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        predict(image)
+        times.append(time.perf_counter() - started)
+    return float(np.median(times)) * 1000
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Export the trained Food-IA model with in-graph preprocessing")
+    parser.add_argument('--student', action='store_true', help="Export the distilled student (distill.py) instead")
+    parser.add_argument('--onnx', action='store_true', help="Also export it to ONNX (needs tf2onnx)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Export pipeline"""
+    args = parse_args(argv)
+
+    print("╔════════════════════════════════════════════════════════════════╗")
+    print("║        🍽️  FOOD-IA: Export Raw-Input Model                   ║")
+    print("╚════════════════════════════════════════════════════════════════╝")
+
+    name = 'student' if args.student else 'full'
+    if args.student:
+        model_path, out_path, onnx_path = STUDENT_MODEL_PATH, STUDENT_RAW_MODEL_PATH, STUDENT_RAW_ONNX_MODEL_PATH
+    else:
+        model_path, out_path, onnx_path = tm.MODEL_PATH, RAW_MODEL_PATH, RAW_ONNX_MODEL_PATH
+    if not os.path.exists(model_path):
+        print(f"\n❌ No trained model at {model_path}")
+        return 1
+    model = tm.keras.models.load_model(model_path, compile=False)
+    height, width = model.input_shape[1:3]
+    image_size = (width, height) if height and width else tm.IMAGE_SIZE
+    print(f"\n📥 Model: {model_path} (images resized to {image_size[0]}x{image_size[1]} in the graph)")
+
+    raw_model = tm.with_preprocessing(model, image_size)
+    raw_model.save(out_path)
+    print(f"   ✅ Saved: {out_path}")
+    bundle = model_bundle.attach_export(name, model_path, out_path, 'keras' + model_bundle.RAW_SUFFIX)
+    if bundle:
+        print(f"   Added to model bundle: {bundle}")
+
+    # Same predictions as the NumPy preprocessing, up to the resize kernels of cv2 and TensorFlow
+    batch = np.random.default_rng(tm.RANDOM_STATE).integers(0, 256, (8, CHECK_SIZE[1], CHECK_SIZE[0], 3),
+                                                           dtype=np.uint8)
+    resized = np.stack([cv2.resize(image, image_size) for image in batch]).astype('float32') / 255.0
+    expected = model.predict(resized, verbose=0)
+    backend = KerasBackend(out_path)
+    difference = np.abs(backend.predict(batch) - expected).max()
+    print(f"   Max difference to NumPy preprocessing: {difference:.2e}")
+
+    original = KerasBackend(model_path)
+    original_ms = latency_ms(lambda x: original.predict(cv2.resize(x[0], image_size)[None].astype('float32') / 255.0),
+                             batch[:1])
+    raw_ms = latency_ms(backend.predict, batch[:1])
+    print(f"   Latency (1 image, {CHECK_SIZE[0]}x{CHECK_SIZE[1]}): {original_ms:.1f} ms -> {raw_ms:.1f} ms")
+
+    if args.onnx:
+        print(f"\n📤 Converting to ONNX...")
+        signature = tf.TensorSpec([None, None, None, 3], tf.uint8, name='image')
+        try:
+            raw_model.export(onnx_path, format='onnx', input_signature=[signature], verbose=False)
+        except ImportError as e:
+            print(f"\n❌ Export failed: {e}")
+            print("   Install the converter with: pip install tf2onnx onnxruntime")
+            return 1
+        onnx_backend = ONNXBackend(onnx_path)
+        difference = np.abs(onnx_backend.predict(batch) - expected).max()
+        print(f"   ✅ Saved: {onnx_path} ({os.path.getsize(onnx_path) / 1024 ** 2:.1f} MB)")
+        bundle = model_bundle.attach_export(name, model_path, onnx_path, 'onnx' + model_bundle.RAW_SUFFIX)
+        if bundle:
+            print(f"   Added to model bundle: {bundle}")
+        print(f"   Max difference to NumPy preprocessing: {difference:.2e}")
+        print(f"   Latency (1 image): {latency_ms(onnx_backend.predict, batch[:1]):.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
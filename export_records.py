@@ -0,0 +1,74 @@
+"""
+Food-IA: Pack the training corpus into sharded TFRecord files
+The filtered dataset is split (train/val/test) and written as a few large
+record files per split plus an index, so training can stream sequential reads:
+
+    python export_records.py
+    python train_model.py --records
+"""
+
+import os
+import sys
+import argparse
+import numpy as np
+
+import train_model as tm
+import records
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Export the Food-IA training set as sharded TFRecords")
+    parser.add_argument('--out', default=tm.RECORDS_DIR, help=f"Output directory (default {tm.RECORDS_DIR})")
+    parser.add_argument('--sample-size', type=int, default=0, help="Number of images to export (0 = all images)")
+    parser.add_argument('--images-per-shard', type=int, default=records.IMAGES_PER_SHARD,
+                        help=f"Images per record file (default {records.IMAGES_PER_SHARD})")
+    parser.add_argument('--drop-duplicates', action='store_true',
+                        help="Drop near-duplicate images before exporting")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Export pipeline"""
+    args = parse_args(argv)
+
+    print("╔════════════════════════════════════════════════════════════════╗")
+    print("║        🍽️  FOOD-IA: Export Sharded Records                   ║")
+    print("╚════════════════════════════════════════════════════════════════╝")
+
+    tm.create_model_directory()
+    data_df, title_col, image_col = tm.load_and_prepare_data()
+    if data_df is not None and args.drop_duplicates:
+        data_df = tm.report_near_duplicates(data_df, drop=True)
+    if data_df is None or len(data_df) == 0:
+        print("\n❌ Export failed: No valid data")
+        return 1
+
+    if args.sample_size:
+        data_df = data_df.sample(min(args.sample_size, len(data_df)), random_state=tm.RANDOM_STATE)
+        print(f"   Using sample of {len(data_df)} images")
+
+    paths = data_df['path'].to_numpy()
+    y = data_df['label'].to_numpy()
+    y_enc, le = tm.encode_labels(y)
+    train_idx, val_idx, test_idx = tm.split_indices(y)
+
+    # Training shards are read sequentially, so mix the classes inside them
+    rng = np.random.default_rng(tm.RANDOM_STATE)
+    train_idx = rng.permutation(train_idx)
+
+    os.makedirs(args.out, exist_ok=True)
+    print(f"\n📦 Writing records to {args.out}...")
+    splits = {}
+    for split, idx in (('train', train_idx), ('val', val_idx), ('test', test_idx)):
+        splits[split] = records.write_split(args.out, split, paths[idx], y_enc[idx], args.images_per_shard)
+        print(f"   {split:5}: {splits[split]['count']} images in {len(splits[split]['files'])} shard(s)"
+              f" ({splits[split]['skipped']} unreadable, {splits[split]['undecodable']} undecodable)")
+
+    records.write_index(args.out, le.classes_, splits, random_state=tm.RANDOM_STATE)
+    print(f"   ✅ Index saved: {os.path.join(args.out, records.INDEX_FILE)}")
+    print(f"\n✨ Train from it with: python train_model.py --records {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
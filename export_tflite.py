@@ -0,0 +1,165 @@
+#!/usr/bin/env python
+"""
+Food-IA: Export the trained model as an int8-quantized TFLite model
+Weights and activations are quantized to 8 bits after training; the
+activation ranges are calibrated on a sample of the model's training split.
+The model takes uint8 input and runs on the TFLite interpreter:
+
+    python export_tflite.py              # models/food_model_int8.tflite
+    python export_tflite.py --student    # models/food_student_int8.tflite
+    FOOD_IA_BACKEND=tflite streamlit run app.py
+"""
+
+import os
+import sys
+import time
+import pickle
+import shutil
+import tempfile
+import argparse
+import numpy as np
+
+import train_model as tm
+import model_bundle
+from inference_backends import TFLiteBackend
+from meal_predictor import (TFLITE_MODEL_PATH, STUDENT_MODEL_PATH, STUDENT_TFLITE_MODEL_PATH,
+                            STUDENT_CLASSES_PATH)
+
+tf = tm.tf
+
+CALIBRATION_IMAGES = 200  # Training images used to calibrate the activation ranges
+CHECK_IMAGES = 200  # Validation images on which the int8 model is compared with the original
+
+
+def convert_int8(model, calibration, image_size):
+    """
+    Full-integer TFLite model (batch size 1, uint8 input, float32 output).
+    calibration: uint8 images [n, height, width, 3].
+    """
+    export_dir = tempfile.mkdtemp(prefix='food_ia_export_')
+    try:
+        signature = tf.TensorSpec([1, image_size[1], image_size[0], 3], tf.float32, name='image')
+        model.export(export_dir, format='tf_saved_model', input_signature=[signature], verbose=False)
+        converter = tf.lite.TFLiteConverter.from_saved_model(export_dir)
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+
+        def representative_dataset():
+            for image in calibration:
+                yield [image[None].astype('float32') / 255.0]
+
+        converter.representative_dataset = representative_dataset
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+        # The uint8 input gets the scale and zero point of the calibrated input
+        # range (about 1/255 and 0 for images in [0, 1]); TFLiteBackend
+        # quantizes every batch with the values stored in the model
+        converter.inference_input_type = tf.uint8
+        return converter.convert()
+    finally:
+        shutil.rmtree(export_dir, ignore_errors=True)
+
+
+def sample_images(image_size, calibration_count, check_count, classes):
+    """
+    Decoded uint8 images: a calibration sample of the training split and a
+    check sample of validation, from the split the model was trained on
+    (the rows saved with its checkpoint; a fresh split if there are none).
+    """
+    saved = tm.load_saved_splits(classes)
+    if saved is not None:
+        data_df, splits = saved
+        train_idx, val_idx = splits['train'], splits['val']
+    else:
+        print("⚠️  No saved split of the model's training run (missing, unfinished, --records or older "
+              "checkpoint): using a fresh split (the check images may include training images)")
+        data_df, title_col, image_col = tm.load_and_prepare_data()
+        if data_df is None or len(data_df) == 0:
+            return None
+        data_df = data_df[data_df['label'].isin(classes)]
+        train_idx, val_idx, _ = tm.split_indices(data_df['label'].to_numpy())
+    rng = np.random.default_rng(tm.RANDOM_STATE)
+    picked = []
+    for idx, count in ((train_idx, calibration_count), (val_idx, check_count)):
+        rows = rng.choice(idx, min(count, len(idx)), replace=False)
+        X, _ = tm.load_images_batch(data_df.iloc[rows], image_size=image_size)
+        picked.append(X)
+    return picked
+
+
+def latency_ms(predict, image, runs=20):
+    """Median wall time of a single-image prediction"""
+    predict(image)
+    times = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        predict(image)
+        times.append(time.perf_counter() - started)
+    return float(np.median(times)) * 1000
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Export the trained Food-IA model as int8 TFLite")
+    parser.add_argument('--student', action='store_true', help="Export the distilled student (distill.py) instead")
+    parser.add_argument('--calibration-images', type=int, default=CALIBRATION_IMAGES,
+                        help=f"Training images used for calibration (default {CALIBRATION_IMAGES})")
+    parser.add_argument('--out', help="Output file (default next to the model)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Export pipeline"""
+    args = parse_args(argv)
+
+    print("╔════════════════════════════════════════════════════════════════╗")
+    print("║        🍽️  FOOD-IA: Export Int8 TFLite Model                 ║")
+    print("╚════════════════════════════════════════════════════════════════╝")
+
+    if args.student:
+        model_path, out_path, classes_path = STUDENT_MODEL_PATH, STUDENT_TFLITE_MODEL_PATH, STUDENT_CLASSES_PATH
+    else:
+        model_path, out_path, classes_path = tm.MODEL_PATH, TFLITE_MODEL_PATH, tm.CLASSES_PATH
+    out_path = args.out or out_path
+    if not os.path.exists(model_path) or not os.path.exists(classes_path):
+        print(f"\n❌ No trained model at {model_path}")
+        return 1
+    model = tm.keras.models.load_model(model_path)
+    with open(classes_path, 'rb') as f:
+        classes = pickle.load(f)
+    height, width = model.input_shape[1:3]
+    image_size = (width, height) if height and width else tm.IMAGE_SIZE
+    print(f"\n📥 Model: {model_path} (exported for {image_size[0]}x{image_size[1]} input)")
+
+    tm.create_model_directory()
+    sample = sample_images(image_size, args.calibration_images, CHECK_IMAGES, classes)
+    if sample is None or sample[0] is None or len(sample[0]) == 0:
+        print("\n❌ Export failed: No calibration images")
+        return 1
+    calibration, check = sample
+
+    print(f"\n⚗️  Quantizing (calibrated on {len(calibration)} images)...")
+    with tm.telemetry.phase('tflite_convert'):
+        tflite_model = convert_int8(model, calibration, image_size)
+    with open(out_path, 'wb') as f:
+        f.write(tflite_model)
+    print(f"   ✅ Saved: {out_path}")
+    bundle = model_bundle.attach_export('student' if args.student else 'full', model_path, out_path, 'tflite')
+    if bundle:
+        print(f"   Added to model bundle: {bundle}")
+    print(f"   Size: {os.path.getsize(model_path) / 1024 ** 2:.1f} MB -> {len(tflite_model) / 1024 ** 2:.1f} MB")
+
+    backend = TFLiteBackend(out_path)
+    if check is not None and len(check):
+        batch = check.astype('float32') / 255.0
+        original = model.predict(batch, batch_size=tm.BATCH_SIZE, verbose=0).argmax(axis=1)
+        quantized = backend.predict(batch).argmax(axis=1)
+        print(f"   Top-1 agreement with the original: {np.mean(original == quantized) * 100:.1f}% "
+              f"({len(check)} validation images)")
+    image = calibration[:1].astype('float32') / 255.0
+    original_ms = latency_ms(lambda x: model(x, training=False), image)
+    quantized_ms = latency_ms(backend.predict, image)
+    print(f"   Latency (1 image): {original_ms:.1f} ms -> {quantized_ms:.1f} ms "
+          f"({backend.num_threads} threads)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
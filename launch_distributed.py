@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+"""
+Food-IA: Run data-parallel training with several local worker processes
+Each worker gets a TF_CONFIG for a localhost cluster and runs
+`train_model.py --distributed`; the CPU cores are split between them.
+
+    python launch_distributed.py --workers 4
+    python launch_distributed.py --workers 2 -- --cache-features
+
+For several hosts, set TF_CONFIG on each host yourself (same "worker" list,
+own "index") and run `python train_model.py --distributed` there; the dataset,
+caches and models/ folder must be on storage shared by all hosts.
+"""
+
+import os
+import sys
+import json
+import socket
+import argparse
+import subprocess
+
+import train_model as tm
+
+
+def free_ports(count):
+    """Ask the OS for unused localhost ports"""
+    sockets = []
+    try:
+        for _ in range(count):
+            s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            s.bind(('localhost', 0))
+            sockets.append(s)
+        return [s.getsockname()[1] for s in sockets]
+    finally:
+        for s in sockets:
+            s.close()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Launch local multi-worker training of the Food-IA model")
+    parser.add_argument('--workers', type=int, default=2, help="Number of worker processes (default 2)")
+    parser.add_argument('--threads', type=int, default=0,
+                        help="Intra-op threads per worker (default: CPU cores / workers)")
+    parser.add_argument('train_args', nargs=argparse.REMAINDER,
+                        help="Options passed on to train_model.py (after --)")
+    args = parser.parse_args(argv)
+    if args.train_args[:1] == ['--']:
+        args.train_args = args.train_args[1:]
+    return args
+
+
+def main(argv=None):
+    """Prepare the data once, then start the workers and wait for them"""
+    args = parse_args(argv)
+    threads = args.threads or max(1, (os.cpu_count() or 1) // args.workers)
+
+    print("╔════════════════════════════════════════════════════════════════╗")
+    print("║        🍽️  FOOD-IA: Distributed Training Launcher            ║")
+    print("╚════════════════════════════════════════════════════════════════╝")
+    print(f"\n⚙️  Workers: {args.workers} x {threads} thread(s)")
+
+    # The workers share the image/feature caches and the manifest: fill them
+    # from one process first so the workers only read them
+    train = [sys.executable, 'train_model.py'] + args.train_args
+    if '--resume' not in args.train_args:
+        print("\n📂 Preparing data and caches...")
+        if subprocess.run(train + ['--prepare-only']).returncode != 0:
+            print("\n❌ Data preparation failed")
+            return 1
+
+    ports = free_ports(args.workers)
+    cluster = {'worker': [f'localhost:{port}' for port in ports]}
+    os.makedirs(tm.MODEL_DIR, exist_ok=True)
+
+    print(f"\n🚀 Starting {args.workers} workers (logs of workers 2+ in {tm.MODEL_DIR}/worker_N.log)...")
+    processes = []
+    logs = []
+    try:
+        for index in range(args.workers):
+            env = dict(os.environ)
+            env['TF_CONFIG'] = json.dumps({'cluster': cluster, 'task': {'type': 'worker', 'index': index}})
+            if index == 0:
+                out = None
+            else:
+                out = open(os.path.join(tm.MODEL_DIR, f'worker_{index + 1}.log'), 'w', encoding='utf-8')
+                logs.append(out)
+            cmd = train + ['--distributed', '--threads', str(threads)]
+            processes.append(subprocess.Popen(cmd, env=env, stdout=out, stderr=subprocess.STDOUT if out else None))
+        codes = [p.wait() for p in processes]
+    except KeyboardInterrupt:
+        print("\n⚠️  Stopping workers...")
+        for p in processes:
+            p.terminate()
+        for p in processes:
+            p.wait()
+        print("   Continue later with: python launch_distributed.py --workers "
+              f"{args.workers} -- --resume")
+        return 1
+    finally:
+        for out in logs:
+            out.close()
+
+    failed = [i + 1 for i, code in enumerate(codes) if code != 0]
+    if failed:
+        print(f"\n❌ Worker(s) {failed} failed")
+        return 1
+    print("\n✅ Distributed training finished")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
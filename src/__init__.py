@@ -7,7 +7,15 @@ __author__ = 'Food-IA Team'
 
 from .meal_predictor import FoodRecognizer, get_recognizer, predict_meal
 from .data_loader import load_food_data
-from .food_model import create_food_cnn
+
+
+def __getattr__(name):
+    # food_model imports tf_keras: only load it when create_food_cnn is used
+    if name == 'create_food_cnn':
+        from .food_model import create_food_cnn
+        return create_food_cnn
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 __all__ = [
     'FoodRecognizer',
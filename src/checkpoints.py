@@ -0,0 +1,156 @@
+"""
+Food-IA: Resumable training checkpoints
+The model (with optimizer state), the EarlyStopping / ReduceLROnPlateau state,
+the seeds and the split indices are written periodically, so an interrupted
+run can continue from its last epoch or step instead of starting over.
+"""
+
+import os
+import json
+import time
+import numpy as np
+from tensorflow import keras
+
+MODEL_FILE = 'model.keras'
+STATE_FILE = 'state.json'
+SPLITS_FILE = 'splits.npz'
+BEST_WEIGHTS_FILE = 'best_weights.npz'
+
+# Callback attributes that make up the EarlyStopping / ReduceLROnPlateau state
+CALLBACK_ATTRS = ('wait', 'best', 'best_epoch', 'stopped_epoch', 'cooldown_counter')
+
+
+def reset(directory):
+    """Forget an earlier run so --resume (or its split indices) cannot be picked up from a stale checkpoint"""
+    for name in (STATE_FILE, SPLITS_FILE):
+        path = os.path.join(directory, name)
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def save_splits(directory, splits):
+    """Store the split of the run: train/val/test row indices and the paths and labels of the rows"""
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = os.path.join(directory, SPLITS_FILE + '.tmp.npz')
+    np.savez(tmp_path, **{name: np.asarray(idx) for name, idx in splits.items()})
+    os.replace(tmp_path, os.path.join(directory, SPLITS_FILE))
+
+
+def load_checkpoint(directory):
+    """
+    Read the last checkpoint state, or None if there is none.
+    The state holds 'epoch' (next epoch to run), 'step' (batches already done in
+    it), 'finished', 'random_state', 'callbacks', the run metadata and 'splits'.
+    """
+    try:
+        with open(os.path.join(directory, STATE_FILE), 'r', encoding='utf-8') as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+    state['model_path'] = os.path.join(directory, MODEL_FILE)
+    state['splits'] = None
+    splits_path = os.path.join(directory, SPLITS_FILE)
+    if os.path.exists(splits_path):
+        with np.load(splits_path) as data:
+            # Splits saved without their rows only index a dataset that may have changed since
+            if 'paths' in data.files:
+                state['splits'] = {name: data[name] for name in data.files}
+    return state
+
+
+def _callback_state(callback):
+    state = {}
+    for attr in CALLBACK_ATTRS:
+        value = getattr(callback, attr, None)
+        if isinstance(value, (int, float, np.integer, np.floating)):
+            state[attr] = float(value) if isinstance(value, (float, np.floating)) else int(value)
+    return state
+
+
+class TrainingCheckpoint(keras.callbacks.Callback):
+    """
+    Save the model and the training state after every epoch (and every
+    `every_steps` batches). Put it after the callbacks it tracks: their
+    on_train_begin resets the state that this callback then restores, so the
+    same instance can also carry the state across several fit() calls.
+    """
+
+    def __init__(self, directory, tracked, epochs, every_steps=0, random_state=0, metadata=None, restore=None):
+        super().__init__()
+        self.directory = directory
+        self.tracked = tracked  # name -> callback
+        self.epochs = epochs
+        self.every_steps = every_steps
+        self.random_state = random_state
+        self.metadata = metadata or {}
+        self.epoch = 0
+        self.step = 0  # Batches done in the current epoch (including resumed ones)
+        self._skipped = 0
+        self._callbacks = None
+        self._best_weights = None
+        if restore:
+            self._callbacks = restore.get('callbacks', {})
+            self._skipped = restore.get('step', 0)
+            best_path = os.path.join(directory, BEST_WEIGHTS_FILE)
+            if os.path.exists(best_path):
+                with np.load(best_path) as data:
+                    self._best_weights = [data[f'w{i}'] for i in range(len(data.files))]
+
+    def on_train_begin(self, logs=None):
+        if self._callbacks is None:
+            return
+        for name, callback in self.tracked.items():
+            for attr, value in self._callbacks.get(name, {}).items():
+                setattr(callback, attr, value)
+        early_stop = self.tracked.get('early_stop')
+        if early_stop is not None and self._best_weights is not None:
+            early_stop.best_weights = self._best_weights
+
+    def on_epoch_begin(self, epoch, logs=None):
+        self.epoch = epoch
+        self.step = self._skipped
+        self._skipped = 0
+
+    def on_train_batch_end(self, batch, logs=None):
+        self.step += 1
+        if self.every_steps and self.step % self.every_steps == 0:
+            self.save(self.epoch, self.step)
+
+    def on_epoch_end(self, epoch, logs=None):
+        self.save(epoch + 1, 0)
+
+    def on_train_end(self, logs=None):
+        # EarlyStopping may have restored the best weights just before this
+        finished = self.model.stop_training or self.epoch + 1 >= self.epochs
+        self.save(self.epoch + 1, 0, finished=finished)
+        self._callbacks = {name: _callback_state(cb) for name, cb in self.tracked.items()}
+        early_stop = self.tracked.get('early_stop')
+        self._best_weights = getattr(early_stop, 'best_weights', None)
+
+    def save(self, epoch, step, finished=False):
+        """Write model + optimizer, then the state file that points at them"""
+        os.makedirs(self.directory, exist_ok=True)
+        model_path = os.path.join(self.directory, MODEL_FILE)
+        tmp_path = os.path.join(self.directory, 'tmp_' + MODEL_FILE)
+        self.model.save(tmp_path)
+        os.replace(tmp_path, model_path)
+
+        early_stop = self.tracked.get('early_stop')
+        if early_stop is not None and getattr(early_stop, 'best_weights', None) is not None:
+            tmp_path = os.path.join(self.directory, BEST_WEIGHTS_FILE + '.tmp.npz')
+            np.savez(tmp_path, **{f'w{i}': w for i, w in enumerate(early_stop.best_weights)})
+            os.replace(tmp_path, os.path.join(self.directory, BEST_WEIGHTS_FILE))
+
+        state = {
+            'epoch': epoch,
+            'step': step,
+            'finished': finished,
+            'random_state': self.random_state,
+            'saved': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'callbacks': {name: _callback_state(cb) for name, cb in self.tracked.items()},
+        }
+        state.update(self.metadata)
+        tmp_path = os.path.join(self.directory, STATE_FILE + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, indent=2)
+        os.replace(tmp_path, os.path.join(self.directory, STATE_FILE))
@@ -1,83 +1,203 @@
 import pandas as pd
 import os
-import cv2
+import glob
+import json
+import functools
+from collections import namedtuple
 import numpy as np
-from sklearn.model_selection import train_test_split
-from tf_keras.utils import to_categorical
+
+try:
+    from .image_cache import ImageCache
+    from .image_io import imread_resized
+except ImportError:
+    from image_cache import ImageCache
+    from image_io import imread_resized
 
 # --- CONFIGURATION ---
 IMAGE_SIZE = (128, 128)  # Taille des images (plus grand que l'OCR car besoin de couleurs)
 
-# Base data folder (point this to the folder that contains the CSV and images).
+# Default base data folder (the folder that contains the CSV and images).
 # In this workspace the dataset is commonly placed under `.venv/data` (but
 # ideally move your dataset out of `.venv` to `data/` so the venv can be
 # recreated without losing data).
+# Override it without editing code with the FOOD_IA_DATASET_PATH /
+# FOOD_IA_CSV_FILE / FOOD_IA_IMAGES_DIR environment variables, or with the
+# keys dataset_path / csv_file / images_dir in CONFIG_FILE.
 DATASET_PATH = r"C:\Users\Administrateur\Documents\OCR\.venv\data"
+CONFIG_FILE = os.environ.get(
+    'FOOD_IA_CONFIG',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'food_ia_config.json')
+)
+
+DatasetConfig = namedtuple('DatasetConfig', ['dataset_path', 'csv_file', 'images_dir'])
+
+
+def _read_config_file(path):
+    """Settings from the optional JSON config file ({} if absent)"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def _find_images_dir(dataset_path):
+    """Try common image folder names, otherwise any folder that contains image files"""
+    possible_image_dirs = [
+        os.path.join(dataset_path, "Food Images"),
+        os.path.join(dataset_path, "images"),
+        os.path.join(dataset_path, "Images"),
+        os.path.join(dataset_path, "food_images"),
+    ]
+    for d in possible_image_dirs:
+        if os.path.isdir(d):
+            return d
 
-# Attempt to auto-detect the CSV file and the images folder inside DATASET_PATH.
-import glob
-
-csv_candidates = glob.glob(os.path.join(DATASET_PATH, "*.csv"))
-if not csv_candidates:
-    raise FileNotFoundError(f"No CSV file found in {DATASET_PATH}. Please place the CSV there or update DATASET_PATH.")
-
-# Use the first CSV found (adjust if multiple exist)
-CSV_FILE = csv_candidates[0]
-
-# Try common image folder names under DATASET_PATH, otherwise pick any folder that
-# contains image files.
-possible_image_dirs = [
-    os.path.join(DATASET_PATH, "Food Images"),
-    os.path.join(DATASET_PATH, "images"),
-    os.path.join(DATASET_PATH, "Images"),
-    os.path.join(DATASET_PATH, "food_images"),
-]
-
-IMAGES_DIR = None
-for d in possible_image_dirs:
-    if os.path.isdir(d):
-        IMAGES_DIR = d
-        break
-
-if IMAGES_DIR is None:
     # Fallback: find any subdirectory with jpg or jpeg files
-    for sub in glob.glob(os.path.join(DATASET_PATH, "*")):
+    for sub in glob.glob(os.path.join(dataset_path, "*")):
         if os.path.isdir(sub):
             jpgs = glob.glob(os.path.join(sub, "*.jpg")) + glob.glob(os.path.join(sub, "*.jpeg"))
             if jpgs:
-                IMAGES_DIR = sub
-                break
+                return sub
 
-if IMAGES_DIR is None:
-    # If still None, set to DATASET_PATH (in case images are placed directly there)
-    IMAGES_DIR = DATASET_PATH
+    # If still None, use dataset_path (in case images are placed directly there)
+    return dataset_path
 
 
-def load_food_data(limit=500):
+@functools.lru_cache(maxsize=None)
+def get_dataset_config():
     """
-    Charge les images et les labels, et crée un dictionnaire de calories.
-    limit: On limite à 500 plats pour ne pas faire exploser la mémoire au début.
+    Resolve the dataset location on first use (memoized).
+
+    Priority: environment variables, then CONFIG_FILE, then DATASET_PATH.
+    Importing this module does no filesystem access; the directory scans
+    happen here, once per process. Raises FileNotFoundError if no CSV is found.
     """
-    print("1. Chargement du CSV...")
-    df = pd.read_csv(CSV_FILE)
+    settings = _read_config_file(CONFIG_FILE)
+    dataset_path = os.environ.get('FOOD_IA_DATASET_PATH') or settings.get('dataset_path') or DATASET_PATH
+    csv_file = os.environ.get('FOOD_IA_CSV_FILE') or settings.get('csv_file')
+    images_dir = os.environ.get('FOOD_IA_IMAGES_DIR') or settings.get('images_dir')
 
-    # Detect common column names (case-insensitive and variants)
+    if not csv_file:
+        # Use the first CSV found (adjust if multiple exist)
+        csv_candidates = sorted(glob.glob(os.path.join(dataset_path, "*.csv")))
+        if not csv_candidates:
+            raise FileNotFoundError(
+                f"No CSV file found in {dataset_path}. Place the CSV there, set FOOD_IA_DATASET_PATH "
+                f"or add dataset_path/csv_file to {CONFIG_FILE}."
+            )
+        csv_file = csv_candidates[0]
+
+    if not images_dir:
+        images_dir = _find_images_dir(dataset_path)
+
+    return DatasetConfig(dataset_path, csv_file, images_dir)
+
+
+def __getattr__(name):
+    # Backwards compatibility: CSV_FILE / IMAGES_DIR used to be module constants
+    if name == 'CSV_FILE':
+        return get_dataset_config().csv_file
+    if name == 'IMAGES_DIR':
+        return get_dataset_config().images_dir
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+
+
+def find_column(df, possible_names):
+    """Detect a column by name (case-insensitive, then substring match)"""
     cols_lower = {c.lower(): c for c in df.columns}
+    for name in possible_names:
+        if name.lower() in cols_lower:
+            return cols_lower[name.lower()]
+    # try substring matches
+    for name in df.columns:
+        for p in possible_names:
+            if p.lower() in name.lower():
+                return name
+    return None
 
-    def find_col(possible_names):
-        for name in possible_names:
-            if name.lower() in cols_lower:
-                return cols_lower[name.lower()]
-        # try substring matches
-        for name in df.columns:
-            for p in possible_names:
-                if p.lower() in name.lower():
-                    return name
+
+def list_image_files(images_dir):
+    """Names of the image files in images_dir (a single directory scan)"""
+    with os.scandir(images_dir) as entries:
+        return [e.name for e in entries if e.name.lower().endswith(IMAGE_EXTENSIONS) and e.is_file()]
+
+
+def image_filenames(names):
+    """File names for the CSV image column (adds .jpg when the extension is missing)"""
+    names = names.astype(str)
+    return names.where(names.str.lower().str.endswith(IMAGE_EXTENSIONS), names + '.jpg')
+
+
+def build_manifest(df, image_col, title_col, images_dir=None, output_path=None, ignore_case=True):
+    """
+    Associe les lignes du CSV aux fichiers images présents.
+
+    Le dossier n'est lu qu'une fois et les lignes sont appariées par une
+    jointure vectorisée, au lieu d'un appel à os.path.exists par ligne. Avec
+    ignore_case (par défaut, comme le manifeste SQLite et un système de
+    fichiers Windows), un nom du CSV correspond aussi à un fichier qui ne
+    diffère que par la casse ; le nombre de ces lignes est affiché dans tous
+    les cas. Renvoie un DataFrame (colonnes path, label et filename) dans
+    l'ordre du CSV ; les lignes sans image sont écartées. Si output_path est
+    donné, le manifeste y est aussi écrit en CSV.
+    """
+    images_dir = get_dataset_config().images_dir if images_dir is None else images_dir
+
+    # Ajoutez l'extension si elle manque dans le CSV
+    filenames = image_filenames(df[image_col])
+
+    files = pd.Series(list_image_files(images_dir), dtype=object)
+    on_disk = pd.DataFrame({'key': files.str.lower(), 'filename': files})
+    rows = pd.DataFrame({'name': filenames.to_numpy(), 'key': filenames.str.lower().to_numpy(),
+                         'label': df[title_col].to_numpy()})
+
+    case_only = ~rows['name'].isin(set(files)) & rows['key'].isin(set(on_disk['key']))
+    if case_only.any():
+        example = rows['name'][case_only].iloc[0]
+        print(f"   {int(case_only.sum())} CSV rows match an image only up to letter case (e.g. {example}): "
+              + ("matched" if ignore_case else "left out"))
+
+    if ignore_case:
+        manifest = rows.merge(on_disk.drop_duplicates('key'), on='key', how='inner')
+    else:
+        manifest = rows.merge(on_disk[['filename']], left_on='name', right_on='filename', how='inner')
+    manifest['path'] = os.path.join(images_dir, '') + manifest['filename']
+    manifest = manifest[['path', 'label', 'filename']]
+
+    if output_path:
+        os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+        manifest.to_csv(output_path, index=False)
+    return manifest
+
+
+def _read_resized(img_path):
+    """Lecture et redimensionnement (None si l'image est absente ou illisible)"""
+    try:
+        # Les grands JPEG sont décodés directement à résolution réduite
+        return imread_resized(img_path, IMAGE_SIZE)
+    except Exception:
         return None
 
-    title_col = find_col(['title', 'name', 'dish', 'recipe'])
-    image_col = find_col(['image_name', 'imagename', 'image', 'image_id', 'file_name', 'filename'])
-    calories_col = find_col(['calories', 'calorie', 'energy', 'kcal'])
+
+def load_food_data(limit=500, use_cache=True, one_hot=False):
+    """
+    Charge les images et les labels, et crée un dictionnaire de calories.
+    limit: On limite à 500 plats pour ne pas faire exploser la mémoire au début.
+    use_cache: Réutilise les images déjà redimensionnées du cache disque (image_cache).
+    one_hot: Renvoie y en one-hot (N x C) au lieu d'entiers (N,), pour les anciens modèles
+             compilés avec categorical_crossentropy.
+    """
+    print("1. Chargement du CSV...")
+    df = pd.read_csv(get_dataset_config().csv_file)
+
+    # Detect common column names (case-insensitive and variants)
+    title_col = find_column(df, ['title', 'name', 'dish', 'recipe'])
+    image_col = find_column(df, ['image_name', 'imagename', 'image', 'image_id', 'file_name', 'filename'])
+    calories_col = find_column(df, ['calories', 'calorie', 'energy', 'kcal'])
 
     if title_col is None or image_col is None:
         raise KeyError(f"Required columns not found in CSV. Detected columns: {list(df.columns)}")
@@ -90,51 +210,45 @@ def load_food_data(limit=500):
     labels = []
     
     # Dictionnaire pour sauvegarder les infos nutritionnelles : { "NomDuPlat": Calories }
-    nutrition_db = {}
+    # (calories may be missing; fall back to None)
+    if calories_col is not None:
+        nutrition_db = dict(zip(df[title_col], df[calories_col]))
+    else:
+        nutrition_db = dict.fromkeys(df[title_col])
     
     # Dictionnaire pour convertir les noms de plats en chiffres (0, 1, 2...)
     unique_dishes = df[title_col].unique()
     label_map = {name: i for i, name in enumerate(unique_dishes)}
     inv_label_map = {i: name for i, name in enumerate(unique_dishes)}
 
+    # Lignes dont l'image existe (une seule lecture du dossier)
+    manifest = build_manifest(df, image_col, title_col)
+
     print(f"2. Chargement des {limit} images...")
+    cache = ImageCache(IMAGE_SIZE) if use_cache else None
     
-    for index, row in df.iterrows():
-        raw_img_name = str(row[image_col])
-        # Ajoutez l'extension si elle manque dans le CSV
-        img_name = raw_img_name if raw_img_name.lower().endswith(('.jpg', '.jpeg', '.png')) else raw_img_name + ".jpg"
-        dish_name = row[title_col]
-        # Calories may be missing; fall back to None
-        calories = None
-        if calories_col is not None:
-            try:
-                calories = row[calories_col]
-            except Exception:
-                calories = None
-        
-        # Remplir la base de données nutritionnelle
-        nutrition_db[dish_name] = calories
-
-        # Chemin complet de l'image
-        img_path = os.path.join(IMAGES_DIR, img_name)
-        
-        try:
-            # Lecture et redimensionnement
-            img = cv2.imread(img_path)
-            if img is not None:
-                img = cv2.resize(img, IMAGE_SIZE)
-                images.append(img)
-                labels.append(label_map[dish_name])
-            else:
-                # Image not found; optionally log or continue
-                continue
-        except Exception:
-            # If an image is unreadable, ignore and continue
-            continue
+    for img_path, dish_name in zip(manifest['path'], manifest['label']):
+        if cache is not None:
+            st = cache.stat(img_path)
+            hit, img = cache.get(img_path, st)
+            if not hit:
+                img = _read_resized(img_path)
+                cache.put(img_path, img, st)
+        else:
+            img = _read_resized(img_path)
+
+        if img is not None:
+            images.append(img)
+            labels.append(label_map[dish_name])
+
+    if cache is not None:
+        cache.flush()
 
     # Conversion en tableaux NumPy
     X = np.array(images, dtype='float32') / 255.0 # Normalisation
-    y = np.array(labels)
-    y = to_categorical(y, num_classes=len(unique_dishes))
+    y = np.array(labels, dtype='int32')  # Labels entiers (sparse_categorical_crossentropy)
+    if one_hot:
+        from tf_keras.utils import to_categorical
+        y = to_categorical(y, num_classes=len(unique_dishes))
 
     return X, y, label_map, inv_label_map, nutrition_db
\ No newline at end of file
@@ -0,0 +1,111 @@
+"""
+Food-IA: Near-duplicate image detection
+Perceptual hashes (DCT pHash) are computed in parallel and indexed in a
+BK-tree, so images within a small Hamming distance of an earlier image can be
+reported and dropped before training.
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import cv2
+import pandas as pd
+
+try:
+    from .image_io import imread_resized
+except ImportError:
+    from image_io import imread_resized
+
+HASH_SIZE = 8  # 8x8 low-frequency DCT block -> 64-bit hash
+DCT_SIZE = 32
+HAMMING_THRESHOLD = 8  # Max differing bits (of 64) to count as the same photo
+
+
+def phash(img_path):
+    """64-bit DCT perceptual hash of an image file (None if it cannot be read)"""
+    img = imread_resized(img_path, (DCT_SIZE, DCT_SIZE), interpolation=cv2.INTER_AREA)
+    if img is None:
+        return None
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY).astype('float32')
+    low = cv2.dct(gray)[:HASH_SIZE, :HASH_SIZE].flatten()
+    # Median without the DC term, which only encodes overall brightness
+    bits = low > np.median(low[1:])
+    return int(np.packbits(bits).view('>u8')[0])
+
+
+def hamming(a, b):
+    return bin(a ^ b).count('1')
+
+
+def compute_hashes(paths, num_workers=None):
+    """Perceptual hashes for many files, computed on a thread pool"""
+    workers = num_workers or min(8, os.cpu_count() or 1)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(phash, paths))
+
+
+class BKTree:
+    """Burkhard-Keller tree over 64-bit hashes with Hamming distance"""
+
+    def __init__(self):
+        self.root = None  # [hash, item, {distance: child}]
+
+    def add(self, h, item):
+        if self.root is None:
+            self.root = [h, item, {}]
+            return
+        node = self.root
+        while True:
+            d = hamming(h, node[0])
+            child = node[2].get(d)
+            if child is None:
+                node[2][d] = [h, item, {}]
+                return
+            node = child
+
+    def search(self, h, threshold):
+        """Items within threshold of h, as (distance, item), closest first"""
+        found = []
+        stack = [self.root] if self.root is not None else []
+        while stack:
+            node = stack.pop()
+            d = hamming(h, node[0])
+            if d <= threshold:
+                found.append((d, node[1]))
+            # Triangle inequality: only children at distance d +/- threshold can match
+            for dist, child in node[2].items():
+                if d - threshold <= dist <= d + threshold:
+                    stack.append(child)
+        return sorted(found, key=lambda x: x[0])
+
+
+def find_near_duplicates(data_df, threshold=HAMMING_THRESHOLD, num_workers=None):
+    """
+    Find images that repeat an earlier image of data_df (in row order).
+
+    Returns a report DataFrame with one row per duplicate: path, label,
+    duplicate_of, duplicate_label and distance (Hamming bits). Unreadable
+    images are ignored.
+    """
+    paths = data_df['path'].tolist()
+    labels = data_df['label'].tolist()
+    hashes = compute_hashes(paths, num_workers)
+
+    tree = BKTree()
+    report = []
+    for i, h in enumerate(hashes):
+        if h is None:
+            continue
+        matches = tree.search(h, threshold)
+        if matches:
+            distance, keeper = matches[0]
+            report.append({
+                'path': paths[i],
+                'label': labels[i],
+                'duplicate_of': paths[keeper],
+                'duplicate_label': labels[keeper],
+                'distance': distance,
+            })
+        else:
+            tree.add(h, i)
+    return pd.DataFrame(report, columns=['path', 'label', 'duplicate_of', 'duplicate_label', 'distance'])
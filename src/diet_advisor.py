@@ -1,10 +1,20 @@
-import cv2
 import numpy as np
-import tensorflow as tf
+
+try:
+    from .image_io import imread_resized
+    from .inference_backends import KerasBackend
+except ImportError:
+    from image_io import imread_resized
+    from inference_backends import KerasBackend
+
+IMAGE_SIZE = (128, 128)
 
 class SportDietAdvisor:
     def __init__(self, model_path, nutrition_db, inv_label_map):
-        self.model = tf.keras.models.load_model(model_path)
+        # Compiled forward pass, warmed up here so analyze_meal does no tracing
+        self.backend = KerasBackend(model_path)
+        self.backend.warmup(IMAGE_SIZE)
+        self.model = self.backend.model
         self.nutrition_db = nutrition_db
         self.inv_label_map = inv_label_map
         self.classes = list(inv_label_map.values())
@@ -16,12 +26,11 @@ class SportDietAdvisor:
         """
         
         # 1. Préparer l'image
-        img = cv2.imread(image_path)
-        img_resized = cv2.resize(img, (128, 128))
-        img_array = np.expand_dims(img_resized, axis=0) / 255.0
+        img_resized = imread_resized(image_path, IMAGE_SIZE)
+        img_array = np.expand_dims(img_resized, axis=0).astype('float32') / 255.0
         
         # 2. Prédire le plat
-        prediction = self.model.predict(img_array)
+        prediction = self.backend.predict(img_array)
         predicted_index = np.argmax(prediction)
         dish_name = self.inv_label_map[predicted_index]
         confidence = np.max(prediction) * 100
@@ -25,5 +25,6 @@ def create_food_cnn(num_classes):
     # Couche de sortie : Autant de neurones que de plats différents
     model.add(Dense(num_classes, activation='softmax'))
 
-    model.compile(optimizer='adam', loss='categorical_crossentropy', metrics=['accuracy'])
+    # Labels entiers (0, 1, 2...) : pas de matrice one-hot N x C en mémoire
+    model.compile(optimizer='adam', loss='sparse_categorical_crossentropy', metrics=['accuracy'])
     return model
\ No newline at end of file
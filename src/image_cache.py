@@ -0,0 +1,269 @@
+"""
+Food-IA: Persistent cache of preprocessed images
+Resized images (and backbone embeddings) are stored as .npy shards and
+memory-mapped on later runs, so only new or modified source files need to be
+decoded again. Several processes (distributed workers, sweep trials) can fill
+the same cache: writes are serialized with a file lock and merged into the
+index on disk. Entries of deleted or modified sources stay until prune().
+"""
+
+import os
+import json
+import threading
+import contextlib
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock, one writer at a time
+    fcntl = None
+
+# Cache location (override with the FOOD_IA_CACHE_DIR environment variable)
+CACHE_DIR = os.environ.get('FOOD_IA_CACHE_DIR', 'cache')
+SHARD_SIZE = 1024  # Entries written per shard file
+INDEX_FILE = 'index.json'
+LOCK_FILE = 'index.lock'
+
+# Row value recorded for sources that could not be decoded
+FAILED_ROW = -1
+
+
+class ArrayCache:
+    """Sharded, memory-mapped array store keyed by source path, mtime and size"""
+
+    def __init__(self, root, item_shape, dtype='uint8', shard_size=SHARD_SIZE):
+        self.root = root
+        self.item_shape = tuple(item_shape)
+        self.dtype = np.dtype(dtype)
+        self.shard_size = shard_size
+        self.entries = {}  # abs path -> [mtime_ns, size, shard, row]
+        self.next_shard = 0
+        self._pending = []  # (abs path, mtime_ns, size, array or None)
+        self._shards = {}
+        self._lock = threading.Lock()
+        self._load_index()
+
+    def _index_path(self):
+        return os.path.join(self.root, INDEX_FILE)
+
+    def _shard_path(self, shard):
+        return os.path.join(self.root, f'shard_{shard:05d}.npy')
+
+    @contextlib.contextmanager
+    def _file_lock(self):
+        """Exclusive lock on the cache across processes (held while the index and shards are written)"""
+        os.makedirs(self.root, exist_ok=True)
+        with open(os.path.join(self.root, LOCK_FILE), 'a') as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _read_index(self):
+        """The index on disk, or None if it is missing or was written for another layout"""
+        try:
+            with open(self._index_path(), 'r', encoding='utf-8') as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if tuple(index.get('item_shape', ())) != self.item_shape or index.get('dtype') != self.dtype.str:
+            return None
+        return index
+
+    def _load_index(self):
+        index = self._read_index()
+        if index is not None:
+            self.entries = index.get('entries', {})
+            self.next_shard = index.get('next_shard', 0)
+
+    def _save_index(self):
+        os.makedirs(self.root, exist_ok=True)
+        index = {
+            'item_shape': list(self.item_shape),
+            'dtype': self.dtype.str,
+            'next_shard': self.next_shard,
+            'entries': self.entries,
+        }
+        tmp_path = f'{self._index_path()}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(index, f)
+        os.replace(tmp_path, self._index_path())
+
+    def _remove_unused_shards(self):
+        """Delete shard files no entry points to any more (all their rows were replaced or pruned)"""
+        used = {entry[2] for entry in self.entries.values() if entry[3] != FAILED_ROW}
+        for shard in range(self.next_shard):
+            if shard not in used and os.path.exists(self._shard_path(shard)):
+                os.remove(self._shard_path(shard))
+                self._shards.pop(shard, None)
+
+    def _shard(self, shard):
+        arr = self._shards.get(shard)
+        if arr is None:
+            arr = np.load(self._shard_path(shard), mmap_mode='r')
+            self._shards[shard] = arr
+        return arr
+
+    @staticmethod
+    def stat(path):
+        """Return (abs path, mtime_ns, size) for a source file, or None if it is missing"""
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return os.path.abspath(path), st.st_mtime_ns, st.st_size
+
+    def get(self, path, st=None):
+        """
+        Look up a source file.
+
+        Returns (hit, array): array is a read-only view into the shard, or None
+        when the source is known to be undecodable.
+        """
+        st = st or self.stat(path)
+        if st is None:
+            return False, None
+        key, mtime_ns, size = st
+        entry = self.entries.get(key)
+        if entry is None or entry[0] != mtime_ns or entry[1] != size:
+            return False, None
+        if entry[3] == FAILED_ROW:
+            return True, None
+        try:
+            return True, self._shard(entry[2])[entry[3]]
+        except (OSError, ValueError, IndexError):
+            return False, None
+
+    def put(self, path, arr, st=None):
+        """Queue a decoded array (or None for a failed decode) to be written to the cache"""
+        st = st or self.stat(path)
+        if st is None:
+            return
+        with self._lock:
+            self._pending.append((*st, arr))
+            if len(self._pending) >= self.shard_size:
+                self._flush_locked()
+
+    def flush(self):
+        """Write queued entries to a new shard and persist the index"""
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        if not self._pending:
+            return
+        with self._file_lock():
+            self._write_pending()
+
+    def _write_pending(self):
+        # Start from the index on disk: other processes may have added entries and shards since
+        index = self._read_index()
+        if index is not None:
+            self.entries = index.get('entries', {})
+            self.next_shard = max(self.next_shard, index.get('next_shard', 0))
+        decoded = [p for p in self._pending if p[3] is not None]
+        shard = self.next_shard
+        if decoded:
+            tmp_path = self._shard_path(shard) + '.tmp'
+            out = np.lib.format.open_memmap(
+                tmp_path, mode='w+', dtype=self.dtype, shape=(len(decoded),) + self.item_shape
+            )
+            for row, (_, _, _, arr) in enumerate(decoded):
+                out[row] = arr
+            out.flush()
+            del out
+            os.replace(tmp_path, self._shard_path(shard))
+            self.next_shard += 1
+        row = 0
+        for key, mtime_ns, size, arr in self._pending:
+            if arr is None:
+                self.entries[key] = [mtime_ns, size, -1, FAILED_ROW]
+            else:
+                self.entries[key] = [mtime_ns, size, shard, row]
+                row += 1
+        self._pending = []
+        self._save_index()
+        self._remove_unused_shards()
+
+    def prune(self):
+        """Drop the entries of deleted or modified sources (and the shards left unused); returns how many"""
+        with self._lock, self._file_lock():
+            self._load_index()
+            stale = [key for key, entry in self.entries.items() if self.stat(key) != (key, entry[0], entry[1])]
+            for key in stale:
+                del self.entries[key]
+            if stale:
+                self._save_index()
+                self._remove_unused_shards()
+        return len(stale)
+
+    def __len__(self):
+        return len(self.entries)
+
+
+class ImageCache(ArrayCache):
+    """Cache of images resized to a fixed (width, height) and stored as BGR uint8"""
+
+    def __init__(self, image_size, cache_dir=CACHE_DIR, shard_size=SHARD_SIZE):
+        width, height = image_size
+        root = os.path.join(cache_dir, f'images_{width}x{height}')
+        super().__init__(root, (height, width, 3), dtype='uint8', shard_size=shard_size)
+
+
+class FeatureCache(ArrayCache):
+    """Cache of backbone embeddings (one vector per image and augmentation variant)"""
+
+    def __init__(self, backbone, image_size, dim, variant=0, augmentation=1, cache_dir=CACHE_DIR,
+                 shard_size=SHARD_SIZE):
+        width, height = image_size
+        # Augmented variants are also keyed by the version of the augmentation that made them
+        suffix = f'_v{variant}' + (f'_aug{augmentation}' if variant and augmentation > 1 else '')
+        root = os.path.join(cache_dir, f'features_{backbone}_{width}x{height}{suffix}')
+        super().__init__(root, (dim,), dtype='float16', shard_size=shard_size)
+
+
+class SoftTargetCache(ArrayCache):
+    """Cache of a teacher model's class probabilities (one vector per image)"""
+
+    def __init__(self, teacher_id, num_classes, cache_dir=CACHE_DIR, shard_size=SHARD_SIZE):
+        root = os.path.join(cache_dir, f'soft_targets_{teacher_id}')
+        super().__init__(root, (num_classes,), dtype='float32', shard_size=shard_size)
+
+
+def prune_caches(cache_dir=CACHE_DIR):
+    """Prune every cache under cache_dir; returns {name: entries dropped}"""
+    pruned = {}
+    if not os.path.isdir(cache_dir):
+        return pruned
+    for name in sorted(os.listdir(cache_dir)):
+        root = os.path.join(cache_dir, name)
+        try:
+            with open(os.path.join(root, INDEX_FILE), 'r', encoding='utf-8') as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            continue
+        pruned[name] = ArrayCache(root, index['item_shape'], index['dtype']).prune()
+    return pruned
+
+
+def cache_summary(cache_dir=CACHE_DIR):
+    """Return (name, entries, bytes on disk) for each cache under cache_dir"""
+    summary = []
+    if not os.path.isdir(cache_dir):
+        return summary
+    for name in sorted(os.listdir(cache_dir)):
+        root = os.path.join(cache_dir, name)
+        index_path = os.path.join(root, INDEX_FILE)
+        if not os.path.isfile(index_path):
+            continue
+        try:
+            with open(index_path, 'r', encoding='utf-8') as f:
+                entries = len(json.load(f).get('entries', {}))
+        except (OSError, ValueError):
+            entries = 0
+        size = sum(e.stat().st_size for e in os.scandir(root) if e.is_file())
+        summary.append((name, entries, size))
+    return summary
@@ -0,0 +1,160 @@
+"""
+Food-IA: Image file helpers
+Header parsing (size, EXIF orientation) that does not decode pixel data, and JPEG decoding at reduced
+resolution (DCT-domain downscaling) before the final resize.
+"""
+
+import struct
+import numpy as np
+import cv2
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+# Bytes read to find the JPEG frame header (EXIF blocks come first)
+HEADER_BYTES = 256 * 1024
+
+# cv2 flags that let libjpeg decode at 1/2, 1/4 or 1/8 of the full size
+REDUCED_DECODE_FLAGS = (
+    (8, cv2.IMREAD_REDUCED_COLOR_8),
+    (4, cv2.IMREAD_REDUCED_COLOR_4),
+    (2, cv2.IMREAD_REDUCED_COLOR_2),
+)
+
+# JPEG start-of-frame markers (baseline, progressive, lossless, arithmetic...)
+JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+
+def read_image_size(data):
+    """Return (width, height) parsed from a JPEG or PNG header, or None"""
+    if data[:8] == PNG_SIGNATURE and len(data) >= 24:
+        width, height = struct.unpack('>II', data[16:24])
+        return width, height
+
+    if data[:2] != b'\xff\xd8':
+        return None
+
+    i = 2
+    n = len(data)
+    while i + 4 <= n:
+        if data[i] != 0xFF:
+            i += 1
+            continue
+        marker = data[i + 1]
+        if marker == 0xFF:
+            # Fill byte
+            i += 1
+            continue
+        if marker == 0x01 or 0xD0 <= marker <= 0xD8:
+            # Markers without a length field
+            i += 2
+            continue
+        seg_len = struct.unpack('>H', data[i + 2:i + 4])[0]
+        if marker in JPEG_SOF_MARKERS:
+            if i + 9 > n:
+                return None
+            height, width = struct.unpack('>HH', data[i + 5:i + 9])
+            return width, height
+        i += 2 + seg_len
+    return None
+
+
+def _tiff_orientation(tiff):
+    """Orientation tag (0x0112) of the first IFD of an EXIF TIFF block, 1 if absent"""
+    order = {b'II': '<', b'MM': '>'}.get(tiff[:2])
+    if order is None or len(tiff) < 8:
+        return 1
+    ifd = struct.unpack(order + 'I', tiff[4:8])[0]
+    if ifd + 2 > len(tiff):
+        return 1
+    count = struct.unpack(order + 'H', tiff[ifd:ifd + 2])[0]
+    for entry in range(ifd + 2, min(ifd + 2 + 12 * count, len(tiff) - 11), 12):
+        tag = struct.unpack(order + 'H', tiff[entry:entry + 2])[0]
+        if tag == 0x0112:
+            value = struct.unpack(order + 'H', tiff[entry + 8:entry + 10])[0]
+            return value if 1 <= value <= 8 else 1
+    return 1
+
+
+def read_exif_orientation(data):
+    """EXIF orientation (1-8) parsed from a JPEG header, 1 if there is none"""
+    if data[:2] != b'\xff\xd8':
+        return 1
+
+    i = 2
+    n = len(data)
+    while i + 4 <= n:
+        if data[i] != 0xFF:
+            return 1
+        marker = data[i + 1]
+        if marker == 0xFF:
+            # Fill byte
+            i += 1
+            continue
+        if marker in (0xD9, 0xDA):
+            # End of image / start of scan: no metadata after this
+            return 1
+        if marker == 0x01 or 0xD0 <= marker <= 0xD8:
+            # Markers without a length field
+            i += 2
+            continue
+        seg_len = struct.unpack('>H', data[i + 2:i + 4])[0]
+        if marker == 0xE1 and data[i + 4:i + 10] == b'Exif\x00\x00':
+            return _tiff_orientation(data[i + 10:i + 2 + seg_len])
+        i += 2 + seg_len
+    return 1
+
+
+def reduction_factor(image_size, target_size):
+    """Largest JPEG scale factor (8, 4, 2 or 1) whose decoded image still covers target_size"""
+    # Compare the short side with the largest target side so EXIF rotation cannot matter
+    short_side = min(image_size)
+    needed = max(target_size)
+    for factor, _ in REDUCED_DECODE_FLAGS:
+        if -(-short_side // factor) >= needed:
+            return factor
+    return 1
+
+
+def decode_reduced(data, target_size):
+    """
+    Decode encoded image bytes (BGR uint8). Large JPEGs are decoded directly at
+    1/2, 1/4 or 1/8 resolution when that still covers target_size (width,
+    height), which skips most of the decode work and memory.
+    Returns None if the data cannot be decoded.
+    """
+    buf = np.frombuffer(data, dtype=np.uint8)
+    flag = cv2.IMREAD_COLOR
+    if buf[:2].tobytes() == b'\xff\xd8':
+        size = read_image_size(buf[:HEADER_BYTES].tobytes())
+        if size:
+            factor = reduction_factor(size, target_size)
+            flag = dict(REDUCED_DECODE_FLAGS).get(factor, cv2.IMREAD_COLOR)
+    return cv2.imdecode(buf, flag)
+
+
+def decode_resized(data, target_size, interpolation=cv2.INTER_LINEAR):
+    """Decode encoded image bytes (at reduced resolution when possible) and resize to target_size, BGR uint8"""
+    img = decode_reduced(data, target_size)
+    if img is None:
+        return None
+    return cv2.resize(img, tuple(target_size), interpolation=interpolation)
+
+
+def _read_bytes(path):
+    try:
+        data = np.fromfile(path, dtype=np.uint8)
+    except (OSError, ValueError):
+        return None
+    return data if data.size else None
+
+
+def imread_resized(path, target_size, interpolation=cv2.INTER_LINEAR):
+    """cv2.imread + cv2.resize with reduced-resolution JPEG decoding (None on failure)"""
+    data = _read_bytes(path)
+    return None if data is None else decode_resized(data, target_size, interpolation)
+
+
+def imread_reduced(path, target_size):
+    """cv2.imread at the smallest JPEG scale that still covers target_size, not resized (None on failure)"""
+    data = _read_bytes(path)
+    return None if data is None else decode_reduced(data, target_size)
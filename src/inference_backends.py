@@ -0,0 +1,180 @@
+"""
+Food-IA: Inference backends for FoodRecognizer
+Each backend loads one model file and maps a float32 batch of normalized
+images [n, height, width, 3] to class probabilities [n, classes]. Models
+exported with their preprocessing (raw_input) instead take BGR uint8 images
+of any size and resize / rescale them in the graph. warmup()
+runs one image through it so the first request is not the slow one. The
+runtime is imported when a backend is created, so a process only loads the
+one it uses.
+"""
+
+import os
+import threading
+import numpy as np
+
+# XLA-compile the Keras forward pass (FOOD_IA_XLA=1; compiled once per image size).
+# Mostly pays off on GPU: on CPU the default TensorFlow kernels are often faster
+XLA = os.environ.get('FOOD_IA_XLA', '0') == '1'
+# Images per forward pass when predicting a large batch
+PREDICT_BATCH_SIZE = 32
+
+
+class KerasBackend:
+    """
+    Keras model (.h5 / .keras) run with TensorFlow (on TensorFlow's own thread pool).
+    Calls the model through one tf.function with a fixed input signature
+    instead of model.predict(), which sets up a data adapter on every call;
+    optionally XLA-compiled (FOOD_IA_XLA=1).
+    """
+
+    name = 'keras'
+
+    def __init__(self, model_path, num_threads=None, jit_compile=None):
+        import tensorflow as tf
+        self.model = tf.keras.models.load_model(model_path)
+        height, width = self.model.input_shape[1:3]
+        self.input_size = (width, height) if height and width else None
+        self.num_classes = self.model.output_shape[-1]
+        self.raw_input = tf.as_dtype(self.model.inputs[0].dtype) == tf.uint8
+        self.dtype = np.uint8 if self.raw_input else np.float32
+        self.jit_compile = XLA if jit_compile is None else jit_compile
+        self._forward = None
+        if self.input_size or self.raw_input:
+            # Raw-input exports take every image size (they resize in the graph)
+            self._forward = self._compile(height, width)
+
+    def _compile(self, height, width):
+        """tf.function over batches of any size with this height and width (None = any)"""
+        import tensorflow as tf
+        signature = [tf.TensorSpec([None, height, width, 3], tf.as_dtype(self.dtype), name='image')]
+        return tf.function(self._call, input_signature=signature, jit_compile=self.jit_compile)
+
+    def _call(self, batch):
+        return self.model(batch, training=False)
+
+    def warmup(self, image_size=None):
+        """Trace (and compile) the forward pass before the first request"""
+        width, height = self.input_size or image_size
+        if self._forward is None:
+            # Model without a fixed input size: pin the one it is served at, so it is traced once
+            self._forward = self._compile(height, width)
+        self.predict(np.zeros((1, height, width, 3), self.dtype))
+
+    def predict(self, batch):
+        batch = np.asarray(batch, dtype=self.dtype)
+        if not len(batch):
+            return np.zeros((0, self.num_classes), np.float32)
+        if self._forward is None:
+            self._forward = self._compile(*batch.shape[1:3])
+        return np.concatenate([self._forward(batch[i:i + PREDICT_BATCH_SIZE]).numpy()
+                               for i in range(0, len(batch), PREDICT_BATCH_SIZE)])
+
+class TFLiteBackend:
+    """
+    (Quantized) TFLite model run with the TFLite interpreter on several threads.
+    Uses the LiteRT package when it is installed, else tf.lite.
+    """
+
+    name = 'tflite'
+    raw_input = False  # uint8 input, but of the fixed exported size
+
+    def __init__(self, model_path, num_threads=None):
+        try:
+            from ai_edge_litert.interpreter import Interpreter
+        except ImportError:
+            import tensorflow as tf
+            Interpreter = tf.lite.Interpreter
+        self.num_threads = num_threads or os.cpu_count()
+        self.interpreter = Interpreter(model_path=model_path, num_threads=self.num_threads)
+        self.interpreter.allocate_tensors()
+        self.input = self.interpreter.get_input_details()[0]
+        self.output = self.interpreter.get_output_details()[0]
+        _, height, width, _ = self.input['shape']
+        self.input_size = (int(width), int(height))
+        self.num_classes = int(self.output['shape'][-1])
+        # One interpreter: invoke() calls from several threads must not overlap
+        self._lock = threading.Lock()
+
+    def warmup(self, image_size=None):
+        self.predict(np.zeros((1, self.input_size[1], self.input_size[0], 3), np.float32))
+
+    def _quantize(self, batch):
+        dtype = self.input['dtype']
+        if dtype == np.float32:
+            return batch.astype(np.float32, copy=False)
+        scale, zero_point = self.input['quantization']
+        info = np.iinfo(dtype)
+        return np.clip(np.round(batch / scale + zero_point), info.min, info.max).astype(dtype)
+
+    def _dequantize(self, values):
+        scale, zero_point = self.output['quantization']
+        if self.output['dtype'] == np.float32 or not scale:
+            return values.astype(np.float32)
+        return (values.astype(np.float32) - zero_point) * scale
+
+    def predict(self, batch):
+        """The model was exported for batch size 1: images are run one by one"""
+        if not len(batch):
+            return np.zeros((0, self.num_classes), np.float32)
+        outputs = []
+        with self._lock:
+            for image in self._quantize(np.asarray(batch)):
+                self.interpreter.set_tensor(self.input['index'], image[None])
+                self.interpreter.invoke()
+                outputs.append(self._dequantize(self.interpreter.get_tensor(self.output['index'])[0]))
+        return np.stack(outputs)
+
+
+class ONNXBackend:
+    """
+    ONNX model run with ONNX Runtime on the CPU execution provider.
+    Needs only the onnxruntime package: TensorFlow is never imported.
+    """
+
+    name = 'onnx'
+
+    def __init__(self, model_path, num_threads=None):
+        import onnxruntime as ort
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        self.session = ort.InferenceSession(model_path, options, providers=['CPUExecutionProvider'])
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        self.raw_input = model_input.type == 'tensor(uint8)'
+        self.dtype = np.uint8 if self.raw_input else np.float32
+        _, height, width, _ = model_input.shape
+        # Symbolic (named) dimensions accept any size
+        self.input_size = (width, height) if isinstance(height, int) and isinstance(width, int) else None
+        self.num_classes = self.session.get_outputs()[0].shape[-1]
+
+    def warmup(self, image_size=None):
+        width, height = self.input_size or image_size
+        self.predict(np.zeros((1, height, width, 3), self.dtype))
+
+    def predict(self, batch):
+        return self.session.run(None, {self.input_name: np.asarray(batch, dtype=self.dtype)})[0]
+
+
+BACKENDS = {
+    'keras': KerasBackend,
+    'tflite': TFLiteBackend,
+    'onnx': ONNXBackend,
+}
+
+EXTENSIONS = {
+    '.tflite': 'tflite',
+    '.onnx': 'onnx',
+}
+
+
+def backend_for(model_path):
+    """Backend name matching a model file's extension"""
+    return EXTENSIONS.get(os.path.splitext(model_path)[1].lower(), 'keras')
+
+
+def load_backend(model_path, backend=None, num_threads=None):
+    """Create the backend (name, or chosen from the file extension) for a model file"""
+    return BACKENDS[backend or backend_for(model_path)](model_path, num_threads=num_threads)
@@ -0,0 +1,225 @@
+"""
+Food-IA: Indexed dataset manifest (SQLite)
+Records every image with its label, header size, file stats, content hash and
+load status. Refreshes only re-read files whose size or mtime changed, and the
+training/verification scripts query it instead of re-reading the CSV and
+re-statting every image.
+"""
+
+import os
+import sqlite3
+import hashlib
+import contextlib
+import pandas as pd
+
+try:
+    from .data_loader import find_column, image_filenames, IMAGE_EXTENSIONS
+    from .image_cache import CACHE_DIR
+    from .image_io import read_image_size
+except ImportError:
+    from data_loader import find_column, image_filenames, IMAGE_EXTENSIONS
+    from image_cache import CACHE_DIR
+    from image_io import read_image_size
+
+MANIFEST_DB = os.path.join(CACHE_DIR, 'manifest.sqlite')
+BUSY_TIMEOUT = 60  # Seconds to wait for another process's write (distributed workers, sweeps)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS images (
+    key TEXT PRIMARY KEY,          -- lower-cased file name
+    filename TEXT NOT NULL,
+    path TEXT NOT NULL,
+    width INTEGER,
+    height INTEGER,
+    file_size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    content_hash TEXT,
+    load_failed INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS labels (
+    key TEXT PRIMARY KEY,          -- lower-cased file name from the CSV
+    label TEXT NOT NULL,
+    row INTEGER NOT NULL           -- position in the CSV (keeps CSV order)
+);
+CREATE INDEX IF NOT EXISTS idx_labels_label ON labels(label);
+CREATE INDEX IF NOT EXISTS idx_labels_row ON labels(row);
+CREATE TABLE IF NOT EXISTS meta (
+    name TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+# Labelled images that can be used for training
+VALID_IMAGES = """
+SELECT i.path, l.label, i.filename, l.row
+FROM labels l JOIN images i ON i.key = l.key
+WHERE i.load_failed = 0
+"""
+
+
+def _file_signature(path):
+    st = os.stat(path)
+    return f"{os.path.abspath(path)}|{st.st_mtime_ns}|{st.st_size}"
+
+
+def _hash_bytes(data):
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+class ManifestStore:
+    """SQLite manifest of the dataset images, refreshed incrementally"""
+
+    def __init__(self, db_path=MANIFEST_DB):
+        self.db_path = db_path
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self.conn = sqlite3.connect(db_path, timeout=BUSY_TIMEOUT)
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def _get_meta(self, name):
+        row = self.conn.execute("SELECT value FROM meta WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, name, value):
+        self.conn.execute("INSERT OR REPLACE INTO meta (name, value) VALUES (?, ?)", (name, value))
+
+    @property
+    def columns(self):
+        """(title column, image column) detected in the CSV at the last refresh"""
+        return self._get_meta('title_col'), self._get_meta('image_col')
+
+    def refresh(self, csv_file, images_dir, phase=None):
+        """
+        Bring the manifest up to date with the CSV and the image folder.
+
+        The CSV is only parsed again when its size or mtime changed, and only
+        new or modified image files are read (header + content hash).
+        phase(name) gives a context manager timing the 'csv_parse' and
+        'existence_check' steps (e.g. telemetry.phase).
+        Raises KeyError if the CSV has no title/image columns.
+        Returns a dict of counts: csv_reloaded, added, changed, removed, unchanged.
+        """
+        phase = phase or (lambda name: contextlib.nullcontext())
+        stats = {'csv_reloaded': False, 'added': 0, 'changed': 0, 'removed': 0, 'unchanged': 0}
+        with self.conn:
+            csv_signature = _file_signature(csv_file)
+            if csv_signature != self._get_meta('csv_signature'):
+                with phase('csv_parse'):
+                    self._load_labels(csv_file)
+                self._set_meta('csv_signature', csv_signature)
+                stats['csv_reloaded'] = True
+
+            with phase('existence_check'):
+                images_dir = os.path.abspath(images_dir)
+                if images_dir != self._get_meta('images_dir'):
+                    # Another folder: every entry is stale
+                    self.conn.execute("DELETE FROM images")
+                    self._set_meta('images_dir', images_dir)
+
+                known = {
+                    key: (file_size, mtime_ns)
+                    for key, file_size, mtime_ns in self.conn.execute("SELECT key, file_size, mtime_ns FROM images")
+                }
+                seen = set()
+                upserts = []
+                with os.scandir(images_dir) as entries:
+                    for entry in entries:
+                        if not entry.name.lower().endswith(IMAGE_EXTENSIONS) or not entry.is_file():
+                            continue
+                        key = entry.name.lower()
+                        if key in seen:
+                            continue
+                        seen.add(key)
+                        st = entry.stat()
+                        previous = known.get(key)
+                        if previous == (st.st_size, st.st_mtime_ns):
+                            stats['unchanged'] += 1
+                            continue
+                        stats['changed' if previous else 'added'] += 1
+                        upserts.append(self._describe(entry.name, entry.path, st))
+
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO images "
+                    "(key, filename, path, width, height, file_size, mtime_ns, content_hash, load_failed) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    upserts,
+                )
+                removed = [(key,) for key in known if key not in seen]
+                self.conn.executemany("DELETE FROM images WHERE key = ?", removed)
+                stats['removed'] = len(removed)
+        return stats
+
+    def _load_labels(self, csv_file):
+        """Replace the label table with the CSV contents (first row wins per image)"""
+        df = pd.read_csv(csv_file)
+        title_col = find_column(df, ['title', 'name', 'dish', 'recipe'])
+        image_col = find_column(df, ['image_name', 'imagename', 'image', 'image_id', 'file_name', 'filename'])
+        if title_col is None or image_col is None:
+            raise KeyError(f"Required columns not found in CSV. Detected columns: {list(df.columns)}")
+
+        df = df.dropna(subset=[image_col, title_col])
+        df = df.drop_duplicates(subset=[image_col])
+        keys = image_filenames(df[image_col]).str.lower()
+        rows = pd.DataFrame({'key': keys.to_numpy(), 'label': df[title_col].astype(str).to_numpy()})
+        rows = rows.drop_duplicates('key')
+
+        self.conn.execute("DELETE FROM labels")
+        self.conn.executemany(
+            "INSERT INTO labels (key, label, row) VALUES (?, ?, ?)",
+            zip(rows['key'], rows['label'], range(len(rows))),
+        )
+        self._set_meta('title_col', title_col)
+        self._set_meta('image_col', image_col)
+        self._set_meta('csv_rows', str(len(rows)))
+
+    @staticmethod
+    def _describe(filename, path, st):
+        """Row for one image file: header size and content hash"""
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            return (filename.lower(), filename, path, None, None, st.st_size, st.st_mtime_ns, None, 1)
+        size = read_image_size(data)
+        width, height = size if size else (None, None)
+        return (filename.lower(), filename, path, width, height, st.st_size, st.st_mtime_ns,
+                _hash_bytes(data), 0 if size else 1)
+
+    def mark_failed(self, paths):
+        """Flag images that could not be decoded so later queries skip them"""
+        with self.conn:
+            self.conn.executemany("UPDATE images SET load_failed = 1 WHERE path = ?", ((p,) for p in paths))
+
+    def count_images(self):
+        """Number of image files in the folder"""
+        return self.conn.execute("SELECT COUNT(*) FROM images").fetchone()[0]
+
+    def count_labelled(self):
+        """(CSV rows with a usable image, without an image file, with an image flagged by mark_failed)"""
+        total = self.conn.execute("SELECT COUNT(*) FROM labels").fetchone()[0]
+        valid = self.conn.execute(f"SELECT COUNT(*) FROM ({VALID_IMAGES})").fetchone()[0]
+        failed = self.conn.execute(
+            "SELECT COUNT(*) FROM labels l JOIN images i ON i.key = l.key WHERE i.load_failed != 0"
+        ).fetchone()[0]
+        return valid, total - valid - failed, failed
+
+    def class_counts(self):
+        """Images per label, largest first (like Series.value_counts)"""
+        rows = self.conn.execute(
+            f"SELECT label, COUNT(*) AS n FROM ({VALID_IMAGES}) GROUP BY label ORDER BY n DESC, label"
+        ).fetchall()
+        return pd.Series(dict(rows), name='count', dtype='int64')
+
+    def dataset(self, min_images_per_class=1):
+        """DataFrame (path, label, filename) in CSV order, for classes with enough images"""
+        query = (
+            f"WITH valid AS ({VALID_IMAGES}) "
+            "SELECT path, label, filename FROM valid "
+            "WHERE label IN (SELECT label FROM valid GROUP BY label HAVING COUNT(*) >= ?) "
+            "ORDER BY row"
+        )
+        return pd.read_sql_query(query, self.conn, params=(min_images_per_class,))
@@ -7,31 +7,125 @@ import os
 import pickle
 import numpy as np
 import cv2
-import tensorflow as tf
 from pathlib import Path
 
+try:
+    from .image_io import imread_resized, imread_reduced
+    from .inference_backends import load_backend
+    from . import model_bundle
+except ImportError:
+    from image_io import imread_resized, imread_reduced
+    from inference_backends import load_backend
+    import model_bundle
+
 # Paths to model artifacts
 MODEL_DIR = 'models'
 MODEL_PATH = os.path.join(MODEL_DIR, 'food_model_trained.h5')
 ENCODER_PATH = os.path.join(MODEL_DIR, 'label_encoder.pkl')
 CLASSES_PATH = os.path.join(MODEL_DIR, 'classes.pkl')
 
-# Image configuration
+# Small CNN distilled from the trained model (see distill.py)
+STUDENT_MODEL_PATH = os.path.join(MODEL_DIR, 'food_student.h5')
+STUDENT_CLASSES_PATH = os.path.join(MODEL_DIR, 'student_classes.pkl')
+
+# Int8-quantized TFLite exports (see export_tflite.py)
+TFLITE_MODEL_PATH = os.path.join(MODEL_DIR, 'food_model_int8.tflite')
+STUDENT_TFLITE_MODEL_PATH = os.path.join(MODEL_DIR, 'food_student_int8.tflite')
+
+# ONNX exports for ONNX Runtime (see export_onnx.py)
+ONNX_MODEL_PATH = os.path.join(MODEL_DIR, 'food_model.onnx')
+STUDENT_ONNX_MODEL_PATH = os.path.join(MODEL_DIR, 'food_student.onnx')
+
+# Model file of each (model, backend) pair
+MODEL_FILES = {
+    ('full', 'keras'): MODEL_PATH,
+    ('full', 'tflite'): TFLITE_MODEL_PATH,
+    ('full', 'onnx'): ONNX_MODEL_PATH,
+    ('student', 'keras'): STUDENT_MODEL_PATH,
+    ('student', 'tflite'): STUDENT_TFLITE_MODEL_PATH,
+    ('student', 'onnx'): STUDENT_ONNX_MODEL_PATH,
+}
+
+# Exports with the resize and rescaling inside the model: raw uint8 input of any size (see export_raw_input.py)
+RAW_MODEL_PATH = os.path.join(MODEL_DIR, 'food_model_raw.keras')
+RAW_ONNX_MODEL_PATH = os.path.join(MODEL_DIR, 'food_model_raw.onnx')
+STUDENT_RAW_MODEL_PATH = os.path.join(MODEL_DIR, 'food_student_raw.keras')
+STUDENT_RAW_ONNX_MODEL_PATH = os.path.join(MODEL_DIR, 'food_student_raw.onnx')
+
+RAW_MODEL_FILES = {
+    ('full', 'keras'): RAW_MODEL_PATH,
+    ('full', 'onnx'): RAW_ONNX_MODEL_PATH,
+    ('student', 'keras'): STUDENT_RAW_MODEL_PATH,
+    ('student', 'onnx'): STUDENT_RAW_ONNX_MODEL_PATH,
+}
+
+# Versioned model bundles (model + manifest, see model_bundle.py)
+BUNDLE_ROOT = model_bundle.BUNDLE_ROOT
+
+# Model used by get_recognizer(): 'full' or 'student' (FOOD_IA_MODEL environment variable)
+MODEL_VARIANT = os.environ.get('FOOD_IA_MODEL', 'full')
+# Inference backend of get_recognizer(): 'keras', 'tflite' or 'onnx' (FOOD_IA_BACKEND environment variable)
+BACKEND = os.environ.get('FOOD_IA_BACKEND', 'keras')
+# Serve the raw-input export of the model (FOOD_IA_RAW_INPUT=1; keras and onnx backends)
+RAW_INPUT = os.environ.get('FOOD_IA_RAW_INPUT', '0') == '1'
+# Threads of the TFLite / ONNX Runtime backends (0 = all CPU cores / ONNX Runtime default)
+NUM_THREADS = int(os.environ.get('FOOD_IA_THREADS', '0'))
+
+# Image configuration (default when the model input accepts any size)
 IMAGE_SIZE = (224, 224)
 
 class FoodRecognizer:
     """Predict meal type from food image using trained CNN"""
     
-    def __init__(self, model_path=MODEL_PATH, encoder_path=ENCODER_PATH, classes_path=CLASSES_PATH):
-        """Initialize the recognizer with trained model"""
-        self.model = None
+    def __init__(self, model_path=MODEL_PATH, encoder_path=ENCODER_PATH, classes_path=CLASSES_PATH,
+                 backend=None, num_threads=None, bundle=None, raw_input=False):
+        """
+        Initialize the recognizer with trained model.
+        backend: 'keras', 'tflite' or 'onnx' (default: from the model file extension)
+        bundle: model bundle directory, used instead of the three separate files
+        raw_input: serve the bundle's raw-input export of the backend (export_raw_input.py)
+        """
+        self.backend = None
+        self.bundle = None
         self.label_encoder = None
         self.classes = None
+        self.image_size = IMAGE_SIZE
+        self.scale = 1 / 255.0
+        self.offset = 0.0
         self.model_loaded = False
         
-        self.load_model(model_path, encoder_path, classes_path)
+        if bundle:
+            self.load_bundle(bundle, backend, num_threads, raw_input)
+        else:
+            self.load_model(model_path, encoder_path, classes_path, backend, num_threads)
     
-    def load_model(self, model_path, encoder_path, classes_path):
+    def load_bundle(self, directory, backend=None, num_threads=None, raw_input=False):
+        """Load a model bundle: checksum-verified model file + manifest (no pickles)"""
+        try:
+            bundle = model_bundle.ModelBundle(directory)
+            backend = backend or ('keras' if 'keras' in bundle.files else next(iter(bundle.files)))
+            key = backend + model_bundle.RAW_SUFFIX if raw_input else backend
+            self.backend = load_backend(bundle.model_path(key), backend, num_threads)
+            bundle.check_outputs(self.backend.num_classes)
+            self.backend.warmup(bundle.input_size)
+        except model_bundle.BundleError as e:
+            print(f"❌ Invalid model bundle: {e}")
+            return False
+        except Exception as e:
+            print(f"❌ Error loading model: {e}")
+            return False
+        
+        self.bundle = bundle
+        self.classes = bundle.classes
+        self.image_size = bundle.input_size
+        self.scale = bundle.preprocessing['scale']
+        self.offset = bundle.preprocessing['offset']
+        print(f"✅ Model bundle loaded: {bundle.name} {bundle.version} ({self.backend.name}, "
+              f"{len(self.classes)} dishes)")
+        self.model_loaded = True
+        return True
+    
+    def load_model(self, model_path, encoder_path, classes_path, backend=None, num_threads=None):
         """Load trained model and artifacts"""
         try:
             # Check if files exist
@@ -41,11 +135,17 @@ class FoodRecognizer:
                 return False
             
             # Load model
-            self.model = tf.keras.models.load_model(model_path)
-            print(f"✅ Model loaded: {model_path}")
+            self.backend = load_backend(model_path, backend, num_threads)
+            print(f"✅ Model loaded: {model_path} ({self.backend.name})")
+            
+            # Input size of the model (the distilled student takes 128x128)
+            if self.backend.input_size:
+                self.image_size = self.backend.input_size
+            # First prediction (tracing / compiling) at load time rather than on the first request
+            self.backend.warmup(self.image_size)
             
             # Load label encoder
-            if os.path.exists(encoder_path):
+            if encoder_path and os.path.exists(encoder_path):
                 with open(encoder_path, 'rb') as f:
                     self.label_encoder = pickle.load(f)
                 print(f"✅ Label encoder loaded")
@@ -66,17 +166,25 @@ class FoodRecognizer:
     def preprocess_image(self, img):
         """Preprocess image for model input"""
         try:
+            if self.backend is not None and self.backend.raw_input:
+                # The model resizes and rescales itself: only decode (at reduced resolution) and batch
+                if isinstance(img, str):
+                    img = imread_reduced(img, self.image_size)
+                    if img is None:
+                        return None
+                return np.asarray(img, dtype=np.uint8)[None]
+            
             if isinstance(img, str):
-                # Load from file path
-                img = cv2.imread(img)
-                if img is None:
+                # Load from file path (large JPEGs are decoded at reduced resolution)
+                img_resized = imread_resized(img, self.image_size)
+                if img_resized is None:
                     return None
-            
-            # Resize to model input size
-            img_resized = cv2.resize(img, IMAGE_SIZE)
+            else:
+                # Resize to model input size
+                img_resized = cv2.resize(img, self.image_size)
             
             # Normalize
-            img_normalized = img_resized.astype('float32') / 255.0
+            img_normalized = img_resized.astype('float32') * self.scale + self.offset
             
             # Add batch dimension
             img_batch = np.expand_dims(img_normalized, axis=0)
@@ -123,7 +231,7 @@ class FoodRecognizer:
         
         try:
             # Make prediction
-            predictions = self.model.predict(img_batch, verbose=0)
+            predictions = self.backend.predict(img_batch)
             pred_probs = predictions[0]
             
             # Get top K predictions
@@ -182,7 +290,32 @@ def get_recognizer():
     """Get or create global recognizer instance"""
     global _recognizer
     if _recognizer is None:
-        _recognizer = FoodRecognizer()
+        # The latest bundle of the model when it has this backend (or its raw-input
+        # export, if asked for), else the separate files
+        bundle = model_bundle.latest(MODEL_VARIANT, BUNDLE_ROOT)
+        files = {}
+        if bundle is not None:
+            try:
+                files = model_bundle.ModelBundle(bundle).files
+            except model_bundle.BundleError:
+                files = None  # Broken bundle: let the recognizer report it instead of serving old files
+        raw_input = RAW_INPUT and (MODEL_VARIANT, BACKEND) in RAW_MODEL_FILES
+        if raw_input and files is not None and BACKEND + model_bundle.RAW_SUFFIX not in files \
+                and not os.path.exists(RAW_MODEL_FILES[(MODEL_VARIANT, BACKEND)]):
+            options = (' --student' if MODEL_VARIANT == 'student' else '') + (' --onnx' if BACKEND == 'onnx' else '')
+            print(f"⚠️  No raw-input export of the {MODEL_VARIANT} model: serving the regular one")
+            print(f"   Create it with: python export_raw_input.py{options}")
+            raw_input = False
+        key = BACKEND + model_bundle.RAW_SUFFIX if raw_input else BACKEND
+        use_bundle = bundle is not None and (files is None or key in files)
+        model_path = (RAW_MODEL_FILES if raw_input else MODEL_FILES)[(MODEL_VARIANT, BACKEND)]
+        if use_bundle:
+            _recognizer = FoodRecognizer(bundle=bundle, backend=BACKEND, num_threads=NUM_THREADS, raw_input=raw_input)
+        elif MODEL_VARIANT == 'student':
+            _recognizer = FoodRecognizer(model_path, encoder_path=None, classes_path=STUDENT_CLASSES_PATH,
+                                         backend=BACKEND, num_threads=NUM_THREADS)
+        else:
+            _recognizer = FoodRecognizer(model_path, backend=BACKEND, num_threads=NUM_THREADS)
     return _recognizer
 
 def predict_meal(image_input):
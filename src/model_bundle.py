@@ -0,0 +1,186 @@
+"""
+Food-IA: Versioned model bundles
+A bundle is a folder models/bundles/<name>/<version>/ holding the model
+file(s) and a manifest.json with the classes, input size, preprocessing,
+training metadata and a SHA-256 checksum per file. Versions sit side by side;
+<name>/LATEST names the one that is served by default.
+"""
+
+import os
+import json
+import time
+import shutil
+import hashlib
+
+BUNDLE_ROOT = os.path.join('models', 'bundles')
+MANIFEST_FILE = 'manifest.json'
+LATEST_FILE = 'LATEST'
+FORMAT_VERSION = 1
+
+# Input of the training pipelines: BGR pixels (cv2 order) * scale + offset, float32
+PREPROCESSING = {'color_order': 'BGR', 'scale': 1 / 255.0, 'offset': 0.0, 'dtype': 'float32'}
+
+# File name of each backend's model inside a bundle
+MODEL_FILE_NAMES = {
+    'keras': 'model.h5',
+    'tflite': 'model_int8.tflite',
+    'onnx': 'model.onnx',
+    # Raw-input exports: resize and rescaling inside the model (export_raw_input.py)
+    'keras_raw': 'model_raw.keras',
+    'onnx_raw': 'model_raw.onnx',
+}
+RAW_SUFFIX = '_raw'  # Bundle key of a backend's raw-input export: backend + RAW_SUFFIX
+
+
+class BundleError(Exception):
+    """A bundle is missing, incomplete or does not match its manifest"""
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _write_json(path, data):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def _describe(path):
+    return {'file': os.path.basename(path), 'sha256': file_sha256(path), 'bytes': os.path.getsize(path)}
+
+
+def write_bundle(model_files, classes, input_size, name='full', metadata=None, root=BUNDLE_ROOT,
+                 preprocessing=PREPROCESSING):
+    """
+    Copy model files ({backend: path}) into a new bundle version, write its
+    manifest and make it the LATEST one. Returns the bundle directory.
+    """
+    version = time.strftime('%Y%m%d-%H%M%S')
+    directory = os.path.join(root, name, version)
+    suffix = 1
+    while os.path.exists(directory):
+        suffix += 1
+        directory = os.path.join(root, name, f'{version}-{suffix}')
+    # Built under a temporary name: a half-written bundle is never visible
+    tmp_dir = directory + '.tmp'
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    files = {}
+    for backend, path in model_files.items():
+        target = os.path.join(tmp_dir, MODEL_FILE_NAMES[backend])
+        shutil.copyfile(path, target)
+        files[backend] = _describe(target)
+    manifest = {
+        'format_version': FORMAT_VERSION,
+        'name': name,
+        'version': os.path.basename(directory),
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'classes': [str(c) for c in classes],
+        'input_size': list(input_size),
+        'preprocessing': dict(preprocessing),
+        'files': files,
+        'metadata': metadata or {},
+    }
+    _write_json(os.path.join(tmp_dir, MANIFEST_FILE), manifest)
+    os.replace(tmp_dir, directory)
+    latest_path = os.path.join(root, name, LATEST_FILE)
+    with open(latest_path + '.tmp', 'w', encoding='utf-8') as f:
+        f.write(os.path.basename(directory))
+    os.replace(latest_path + '.tmp', latest_path)
+    return directory
+
+
+def add_file(directory, path, backend):
+    """Add (or replace) one backend's model file in an existing bundle"""
+    target = os.path.join(directory, MODEL_FILE_NAMES[backend])
+    shutil.copyfile(path, target)
+    manifest_path = os.path.join(directory, MANIFEST_FILE)
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    manifest['files'][backend] = _describe(target)
+    _write_json(manifest_path, manifest)
+
+
+def latest(name='full', root=BUNDLE_ROOT):
+    """Directory of the LATEST bundle version, or None if there is none"""
+    try:
+        with open(os.path.join(root, name, LATEST_FILE), 'r', encoding='utf-8') as f:
+            version = f.read().strip()
+    except OSError:
+        return None
+    directory = os.path.join(root, name, version)
+    return directory if os.path.isfile(os.path.join(directory, MANIFEST_FILE)) else None
+
+
+def versions(name='full', root=BUNDLE_ROOT):
+    """All complete bundle versions of a model, oldest first"""
+    folder = os.path.join(root, name)
+    if not os.path.isdir(folder):
+        return []
+    return sorted(v for v in os.listdir(folder) if os.path.isfile(os.path.join(folder, v, MANIFEST_FILE)))
+
+
+def attach_export(name, source_model_path, export_path, backend, root=BUNDLE_ROOT):
+    """
+    Add an exported model (TFLite, ONNX) to the LATEST bundle if that bundle
+    holds the Keras model it was exported from. Returns the bundle directory or None.
+    """
+    directory = latest(name, root)
+    if directory is None:
+        return None
+    keras_file = ModelBundle(directory).files.get('keras')
+    if keras_file is None or keras_file['sha256'] != file_sha256(source_model_path):
+        return None
+    add_file(directory, export_path, backend)
+    return directory
+
+
+class ModelBundle:
+    """
+    Manifest of one bundle version. Reading it is cheap; a model file is only
+    checksummed when it is first requested (once per backend).
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        try:
+            with open(os.path.join(directory, MANIFEST_FILE), 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError) as e:
+            raise BundleError(f"Cannot read the manifest of {directory}: {e}")
+        if manifest.get('format_version', 0) > FORMAT_VERSION:
+            raise BundleError(f"Bundle {directory} has a newer format ({manifest['format_version']})")
+        self.manifest = manifest
+        self.name = manifest['name']
+        self.version = manifest['version']
+        self.classes = manifest['classes']
+        self.input_size = tuple(manifest['input_size'])
+        self.preprocessing = manifest['preprocessing']
+        self.files = manifest['files']
+        self.metadata = manifest.get('metadata', {})
+        self._verified = set()
+
+    def model_path(self, backend):
+        """Path of a backend's model file, after checking it against the manifest"""
+        entry = self.files.get(backend)
+        if entry is None:
+            raise BundleError(f"Bundle {self.version} has no {backend} model (has: {', '.join(self.files)})")
+        path = os.path.join(self.directory, entry['file'])
+        if backend not in self._verified:
+            if not os.path.isfile(path):
+                raise BundleError(f"Missing model file {path}")
+            if os.path.getsize(path) != entry['bytes'] or file_sha256(path) != entry['sha256']:
+                raise BundleError(f"Checksum mismatch for {path}: the file changed after the bundle was written")
+            self._verified.add(backend)
+        return path
+
+    def check_outputs(self, num_classes):
+        """The model must have one output per class of the manifest"""
+        if num_classes != len(self.classes):
+            raise BundleError(f"Model has {num_classes} outputs but the manifest lists {len(self.classes)} classes")
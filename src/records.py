@@ -0,0 +1,128 @@
+"""
+Food-IA: Sharded TFRecord storage for the training corpus
+The filtered dataset is packed into a few large record files per split (the
+original encoded image bytes + integer label) with a JSON index, so training
+reads large sequential files instead of opening thousands of small JPEGs.
+"""
+
+import os
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+import tensorflow as tf
+
+INDEX_FILE = 'index.json'
+IMAGES_PER_SHARD = 2048
+SHUFFLE_BUFFER = 2048  # Records shuffled across the interleaved shards
+
+FEATURES = {
+    'image': tf.io.FixedLenFeature([], tf.string),
+    'label': tf.io.FixedLenFeature([], tf.int64),
+    'filename': tf.io.FixedLenFeature([], tf.string),
+}
+
+
+def _example(image_bytes, label, filename):
+    return tf.train.Example(features=tf.train.Features(feature={
+        'image': tf.train.Feature(bytes_list=tf.train.BytesList(value=[image_bytes])),
+        'label': tf.train.Feature(int64_list=tf.train.Int64List(value=[int(label)])),
+        'filename': tf.train.Feature(bytes_list=tf.train.BytesList(value=[filename.encode('utf-8')])),
+    }))
+
+
+def _read_checked(path):
+    """
+    Encoded bytes of an image file, 'unreadable' if it cannot be opened or
+    'undecodable' if the training pipeline's decoder rejects it.
+    """
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+    except OSError:
+        return 'unreadable'
+    try:
+        tf.io.decode_image(data, channels=3, expand_animations=False)
+    except tf.errors.OpError:
+        return 'undecodable'
+    return data
+
+
+def write_split(out_dir, split, paths, labels, images_per_shard=IMAGES_PER_SHARD, num_workers=None):
+    """
+    Write one split as numbered shards. Files that cannot be read or decoded
+    are skipped (decoded on num_workers threads), so 'count' is the number of
+    records training will see.
+    Returns the index entry {'files': [...], 'count': n, 'skipped': m, 'undecodable': k}.
+    """
+    num_shards = max(1, -(-len(paths) // images_per_shard))
+    files = []
+    count = 0
+    failed = {'unreadable': 0, 'undecodable': 0}
+    with ThreadPoolExecutor(max_workers=num_workers or os.cpu_count()) as pool:
+        for shard in range(num_shards):
+            name = f'{split}-{shard:05d}-of-{num_shards:05d}.tfrecord'
+            start = shard * images_per_shard
+            shard_paths = paths[start:start + images_per_shard]
+            with tf.io.TFRecordWriter(os.path.join(out_dir, name)) as writer:
+                for path, label, data in zip(shard_paths, labels[start:start + images_per_shard],
+                                             pool.map(_read_checked, shard_paths)):
+                    if isinstance(data, str):
+                        failed[data] += 1
+                        continue
+                    writer.write(_example(data, label, os.path.basename(path)).SerializeToString())
+                    count += 1
+            files.append(name)
+    return {'files': files, 'count': count, 'skipped': failed['unreadable'], 'undecodable': failed['undecodable']}
+
+
+def write_index(out_dir, classes, splits, **metadata):
+    """Write index.json describing the shards of every split"""
+    index = {
+        'format': 'tfrecord',
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'classes': [str(c) for c in classes],
+        'splits': splits,
+    }
+    index.update(metadata)
+    with open(os.path.join(out_dir, INDEX_FILE), 'w', encoding='utf-8') as f:
+        json.dump(index, f, indent=2, ensure_ascii=False)
+    return index
+
+
+def read_index(record_dir):
+    with open(os.path.join(record_dir, INDEX_FILE), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _parse(serialized):
+    example = tf.io.parse_single_example(serialized, FEATURES)
+    return example['image'], tf.cast(example['label'], tf.int32)
+
+
+def read_split(record_dir, split, training=False, seed=None, num_shards=1, shard=0):
+    """
+    Dataset of (encoded image bytes, label) for one split.
+
+    Shards are read in parallel with interleave; for training the shard order
+    and the records are shuffled. With num_shards > 1 (one per distributed
+    worker) the record order is made deterministic, so every worker sees the
+    same sequence and keeps its own `shard`-th records (before they are
+    decoded); all workers get the same number of records.
+    """
+    index = read_index(record_dir)
+    entry = index['splits'][split]
+    files = [os.path.join(record_dir, name) for name in entry['files']]
+    ds = tf.data.Dataset.from_tensor_slices(files)
+    if training:
+        ds = ds.shuffle(len(files), seed=seed, reshuffle_each_iteration=True)
+    ds = ds.interleave(
+        tf.data.TFRecordDataset,
+        cycle_length=min(len(files), 8),
+        num_parallel_calls=tf.data.AUTOTUNE,
+        deterministic=not training or num_shards > 1,
+    )
+    if training:
+        ds = ds.shuffle(SHUFFLE_BUFFER, seed=seed, reshuffle_each_iteration=True)
+    if num_shards > 1:
+        ds = ds.shard(num_shards, shard).take(entry['count'] // num_shards)
+    return ds.map(_parse, num_parallel_calls=tf.data.AUTOTUNE)
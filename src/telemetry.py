@@ -0,0 +1,202 @@
+"""
+Food-IA: Training telemetry
+Times the data loading phases and every training step (input wait vs compute,
+images/sec, peak RSS) and appends them as JSON lines tagged with a run id, so
+runs can be compared with pandas.read_json(path, lines=True).
+"""
+
+import os
+import sys
+import json
+import atexit
+import time
+import threading
+import contextlib
+import numpy as np
+import tensorflow as tf
+from tensorflow import keras
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+_log = None  # Open TelemetryLog of this process (see start())
+_phases = {}  # phase name -> total seconds in this process
+
+
+def peak_rss_mb():
+    """Peak resident memory of this process in MB (None where it is not available)"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return round(peak / (1024 ** 2 if sys.platform == 'darwin' else 1024), 1)
+
+
+class TelemetryLog:
+    """Append-only JSONL file; every record gets the run id and a timestamp"""
+
+    def __init__(self, path, run_id=None):
+        self.path = path
+        self.run_id = run_id or time.strftime('%Y%m%d-%H%M%S')
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def write(self, event, **fields):
+        record = {'run': self.run_id, 'event': event, 'time': round(time.time(), 3), **fields}
+        with self._lock:
+            self._file.write(json.dumps(record, default=float) + '\n')
+            self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+def start(path, **fields):
+    """Open the run's log (appending to earlier runs) and write a 'run_start' record"""
+    global _log
+    if _log is not None:
+        _log.close()
+    _log = TelemetryLog(path)
+    _log.write('run_start', pid=os.getpid(), **fields)
+    atexit.register(finish)
+    return _log
+
+
+def record(event, **fields):
+    """Write a record if a log is open"""
+    if _log is not None:
+        _log.write(event, **fields)
+
+
+def finish(**fields):
+    """Write the phase totals and a 'run_end' record, then close the log"""
+    global _log
+    if _log is None:
+        return
+    _log.write('run_end', phases={name: round(s, 3) for name, s in _phases.items()},
+               peak_rss_mb=peak_rss_mb(), **fields)
+    _log.close()
+    _log = None
+
+
+@contextlib.contextmanager
+def phase(name, **fields):
+    """Time a block (CSV parse, existence check, decode, split, ...) and record it"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - started
+        _phases[name] = _phases.get(name, 0.0) + seconds
+        record('phase', phase=name, seconds=round(seconds, 4), peak_rss_mb=peak_rss_mb(), **fields)
+
+
+def phase_totals():
+    """Seconds spent in each phase so far, in the order they first ran"""
+    return dict(_phases)
+
+
+class ThroughputMonitor(keras.callbacks.Callback):
+    """
+    Measure every training step: time waiting for the input batch, compute
+    time, images/sec and peak RSS; print an epoch summary and record steps and
+    epochs to the telemetry log.
+
+    The training loop calls arrived() once the step holds its batch: inside
+    model.train_step under fit() (see wrap_step), right after fetching the
+    batch in a custom loop. The time from the start of the step to that moment
+    is data wait, the rest is compute. Steps that were not stamped count
+    batch_size images and no data wait.
+    """
+
+    def __init__(self, batch_size, log_steps=True):
+        super().__init__()
+        self.batch_size = batch_size
+        self.log_steps = log_steps
+        self._step_start = None
+        self._arrived = None
+        self._images = 0
+        self._traced = False
+        self._epoch = 0
+        self._epoch_start = None
+        self.wait = []
+        self.compute = []
+        self.images = []
+
+    def arrived(self, images):
+        """The current step got its batch of `images` images"""
+        self._arrived = time.perf_counter()
+        self._images = int(images)
+
+    def _stamp(self, images):
+        self.arrived(images)
+        return np.float64(self._arrived)
+
+    def wrap_step(self, model):
+        """
+        Stamp the batch at the start of model.train_step, where fit() consumes it
+        (tf.data stamps run whenever the pipeline prefetches, outside the step).
+        XLA cannot compile the stamp: jit-compiled models are left unwrapped.
+        """
+        if model.jit_compile:
+            return
+        train_step = model.train_step
+
+        def step(data):
+            x = data[0] if isinstance(data, (tuple, list)) else data
+            t = tf.numpy_function(self._stamp, [tf.shape(x)[0]], tf.float64)
+            with tf.control_dependencies([t]):
+                data = tf.nest.map_structure(tf.identity, data)
+            return train_step(data)
+        model.train_step = step
+
+    def on_epoch_begin(self, epoch, logs=None):
+        self.wait = []
+        self.compute = []
+        self.images = []
+        self._epoch = epoch
+        self._epoch_start = time.perf_counter()
+
+    def on_train_batch_begin(self, batch, logs=None):
+        self._step_start = time.perf_counter()
+        self._arrived = None
+        self._images = self.batch_size
+
+    def on_train_batch_end(self, batch, logs=None):
+        end = time.perf_counter()
+        if not self._traced:
+            # The first step also builds the graph; leave it out of the averages
+            self._traced = True
+            return
+        arrived = self._arrived if self._arrived is not None else self._step_start
+        wait = max(arrived - self._step_start, 0.0)
+        compute = end - arrived
+        self.wait.append(wait)
+        self.compute.append(compute)
+        self.images.append(self._images)
+        if self.log_steps:
+            record('step', epoch=self._epoch, step=batch,
+                   images=self._images, wait_ms=round(wait * 1000, 3), compute_ms=round(compute * 1000, 3),
+                   images_per_sec=round(self._images / max(end - self._step_start, 1e-9), 1),
+                   peak_rss_mb=peak_rss_mb())
+
+    def on_epoch_end(self, epoch, logs=None):
+        seconds = time.perf_counter() - self._epoch_start
+        if not self.wait:
+            return
+        wait = float(np.mean(self.wait)) * 1000
+        compute = float(np.mean(self.compute)) * 1000
+        share = wait / max(wait + compute, 1e-9) * 100
+        images_per_sec = sum(self.images) / max(sum(self.wait) + sum(self.compute), 1e-9)
+        rss = peak_rss_mb()
+        print(f"\n   ⏱️  Data wait: {wait:.1f} ms/step, compute: {compute:.1f} ms/step ({share:.0f}% waiting for input)"
+              f", {images_per_sec:.0f} images/s" + (f", peak RSS {rss:.0f} MB" if rss else ""))
+        record('epoch', epoch=epoch, steps=len(self.wait), images=sum(self.images),
+               wait_ms=round(wait, 3), compute_ms=round(compute, 3), wait_share=round(share / 100, 4),
+               images_per_sec=round(images_per_sec, 1), seconds=round(seconds, 3), peak_rss_mb=rss,
+               **{name: float(value) for name, value in (logs or {}).items()})
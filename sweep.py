@@ -0,0 +1,238 @@
+#!/usr/bin/env python
+"""
+Food-IA: Hyperparameter sweep of the classification head
+Images are embedded once with the frozen backbone (feature cache) and saved
+as arrays that every trial process memory-maps. Trials run in parallel
+processes; asynchronous successive halving (ASHA) only lets the best 1/eta
+trials of each rung train for more epochs, the rest are pruned.
+
+    python sweep.py --trials 24 --parallel 4
+"""
+
+import os
+import sys
+import time
+import json
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+import numpy as np
+import pandas as pd
+
+import train_model as tm
+
+SWEEP_DIR = 'sweeps'
+RESULTS_FILE = 'results.csv'
+
+# Values tried for each hyperparameter (one is drawn at random per trial)
+SEARCH_SPACE = {
+    'batch_size': [16, 32, 64],
+    'units1': [128, 256, 512],
+    'units2': [64, 128, 256],
+    'dropout1': [0.3, 0.4, 0.5, 0.6],
+    'dropout2': [0.1, 0.2, 0.3, 0.4],
+    'learning_rate': [3e-4, 1e-3, 3e-3],
+}
+
+
+def sample_params(rng):
+    return {name: values[int(rng.integers(len(values)))] for name, values in SEARCH_SPACE.items()}
+
+
+def rung_epochs(min_epochs, max_epochs, eta):
+    """Epoch budget of each rung: min_epochs, min_epochs * eta, ... capped at max_epochs"""
+    rungs = [min_epochs]
+    while rungs[-1] < max_epochs:
+        rungs.append(min(rungs[-1] * eta, max_epochs))
+    return rungs
+
+
+def prepare_data(out_dir, sample_size, variants):
+    """Embed and split the dataset once, saved as .npy arrays for the trial processes"""
+    tm.create_model_directory()
+    data_df, title_col, image_col = tm.load_and_prepare_data()
+    if data_df is None or len(data_df) == 0:
+        return None
+    data, le, splits = tm.load_feature_splits(data_df, sample_size, variants)
+    data_dir = os.path.join(out_dir, 'data')
+    os.makedirs(data_dir, exist_ok=True)
+    for split in ('train', 'val'):
+        x, y = data[split]
+        np.save(os.path.join(data_dir, f'{split}_x.npy'), x)
+        np.save(os.path.join(data_dir, f'{split}_y.npy'), y.astype('int32'))
+    return data_dir, len(le.classes_), len(data['train'][1]), len(data['val'][1])
+
+
+def _init_worker(threads):
+    if threads:
+        tm.tf.config.threading.set_intra_op_parallelism_threads(threads)
+
+
+def run_trial(trial, params, data_dir, model_dir, num_classes, start_epoch, epochs):
+    """
+    Train one trial's head from start_epoch to epochs (continuing from its
+    saved model) and return its validation metrics. Runs in a worker process.
+    """
+    started = time.time()
+    arrays = {name: np.load(os.path.join(data_dir, f'{name}.npy'), mmap_mode='r')
+              for name in ('train_x', 'train_y', 'val_x', 'val_y')}
+    model_path = os.path.join(model_dir, f'trial_{trial:03d}.keras')
+
+    if start_epoch:
+        model = tm.keras.models.load_model(model_path)
+    else:
+        tm.keras.utils.set_random_seed(tm.RANDOM_STATE + trial)
+        model = tm.build_head(
+            num_classes,
+            units=(params['units1'], params['units2']),
+            dropout=(params['dropout1'], params['dropout2']),
+            learning_rate=params['learning_rate'],
+        )
+
+    train_data = tm.make_feature_dataset(arrays['train_x'], arrays['train_y'], training=True,
+                                         batch_size=params['batch_size'])
+    val_data = tm.make_feature_dataset(arrays['val_x'], arrays['val_y'], batch_size=params['batch_size'])
+    history = model.fit(
+        train_data,
+        epochs=epochs,
+        initial_epoch=start_epoch,
+        validation_data=val_data,
+        callbacks=[tm.epoch_order()],
+        verbose=0
+    )
+    model.save(model_path)
+    return {
+        'trial': trial,
+        'epochs': epochs,
+        'val_loss': float(history.history['val_loss'][-1]),
+        'val_accuracy': float(history.history['val_accuracy'][-1]),
+        'seconds': round(time.time() - started, 1),
+    }
+
+
+class ASHAScheduler:
+    """
+    Asynchronous successive halving: a free worker either promotes a trial
+    that is in the top 1/eta of its rung (and not promoted yet) or starts a
+    new trial on the first rung.
+    """
+
+    def __init__(self, rungs, eta, num_trials):
+        self.rungs = rungs
+        self.eta = eta
+        self.num_trials = num_trials
+        self.next_trial = 0
+        self.results = [[] for _ in rungs]  # rung -> [(val_loss, trial)]
+        self.promoted = [set() for _ in rungs]
+
+    def next_job(self):
+        """(trial, rung) to run next, or None if nothing can start now"""
+        for rung in range(len(self.rungs) - 2, -1, -1):
+            ranked = sorted(self.results[rung])
+            for val_loss, trial in ranked[:len(ranked) // self.eta]:
+                if trial not in self.promoted[rung]:
+                    self.promoted[rung].add(trial)
+                    return trial, rung + 1
+        if self.next_trial < self.num_trials:
+            self.next_trial += 1
+            return self.next_trial - 1, 0
+        return None
+
+    def report(self, trial, rung, val_loss):
+        self.results[rung].append((val_loss, trial))
+
+    def status(self, trial, rung):
+        if rung == len(self.rungs) - 1:
+            return 'completed'
+        return 'promoted' if trial in self.promoted[rung] else 'pruned'
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Hyperparameter sweep of the Food-IA classification head")
+    parser.add_argument('--trials', type=int, default=16, help="Number of configurations to try (default 16)")
+    parser.add_argument('--parallel', type=int, default=max(1, min(4, (os.cpu_count() or 1) // 2)),
+                        help="Trials trained at the same time (processes)")
+    parser.add_argument('--min-epochs', type=int, default=1, help="Epochs of the first rung (default 1)")
+    parser.add_argument('--max-epochs', type=int, default=tm.EPOCHS, help=f"Epochs of the last rung (default {tm.EPOCHS})")
+    parser.add_argument('--eta', type=int, default=3, help="Keep the best 1/eta trials of each rung (default 3)")
+    parser.add_argument('--sample-size', type=int, default=0, help="Number of images to use (0 = all images)")
+    parser.add_argument('--feature-variants', type=int, default=1,
+                        help="Embedded copies of each training image (1 = no augmentation)")
+    parser.add_argument('--out', default=SWEEP_DIR, help=f"Output directory (default {SWEEP_DIR})")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Sweep pipeline"""
+    args = parse_args(argv)
+
+    print("╔════════════════════════════════════════════════════════════════╗")
+    print("║        🍽️  FOOD-IA: Hyperparameter Sweep                     ║")
+    print("╚════════════════════════════════════════════════════════════════╝")
+
+    rungs = rung_epochs(args.min_epochs, args.max_epochs, args.eta)
+    threads = max(1, (os.cpu_count() or 1) // args.parallel)
+    print(f"\n⚙️  Trials: {args.trials}, parallel: {args.parallel} x {threads} thread(s)")
+    print(f"   Rungs (epochs): {rungs}, keep top 1/{args.eta}")
+
+    prepared = prepare_data(args.out, args.sample_size or None, args.feature_variants)
+    if prepared is None:
+        print("\n❌ Sweep failed: No valid data")
+        return 1
+    data_dir, num_classes, n_train, n_val = prepared
+    print(f"   Embeddings: {n_train} train / {n_val} validation, {num_classes} classes")
+
+    model_dir = os.path.join(args.out, 'trials')
+    os.makedirs(model_dir, exist_ok=True)
+    rng = np.random.default_rng(tm.RANDOM_STATE)
+    params = [sample_params(rng) for _ in range(args.trials)]
+    scheduler = ASHAScheduler(rungs, args.eta, args.trials)
+    rows = []
+
+    print(f"\n🔬 Running trials...")
+    context = multiprocessing.get_context('spawn')  # TensorFlow is not fork-safe
+    with ProcessPoolExecutor(args.parallel, mp_context=context, initializer=_init_worker,
+                             initargs=(threads,)) as pool:
+        running = {}
+
+        def submit():
+            while len(running) < args.parallel:
+                job = scheduler.next_job()
+                if job is None:
+                    return
+                trial, rung = job
+                start = rungs[rung - 1] if rung else 0
+                future = pool.submit(run_trial, trial, params[trial], data_dir, model_dir,
+                                     num_classes, start, rungs[rung])
+                running[future] = (trial, rung)
+
+        submit()
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                trial, rung = running.pop(future)
+                result = future.result()
+                scheduler.report(trial, rung, result['val_loss'])
+                rows.append({'rung': rung, **params[trial], **result})
+                print(f"   trial {trial:3d} | {result['epochs']:3d} epochs | val_loss {result['val_loss']:.4f}"
+                      f" | val_acc {result['val_accuracy']*100:5.1f}% | {result['seconds']:.0f}s")
+            submit()
+
+    results = pd.DataFrame(rows)
+    results['status'] = [scheduler.status(t, r) for t, r in zip(results['trial'], results['rung'])]
+    results = results.sort_values(['rung', 'val_loss'], ascending=[False, True])
+    results_path = os.path.join(args.out, RESULTS_FILE)
+    results.to_csv(results_path, index=False)
+
+    print(f"\n📋 Results ({results_path}):")
+    print(results.head(10).to_string(index=False))
+    best = results.iloc[0]
+    best_params = params[int(best['trial'])]
+    with open(os.path.join(args.out, 'best_params.json'), 'w', encoding='utf-8') as f:
+        json.dump({'trial': int(best['trial']), 'epochs': int(best['epochs']), **best_params}, f, indent=2)
+    print(f"\n🏆 Best trial {int(best['trial'])}: {best_params}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -7,21 +7,28 @@ import os
 import sys
 import numpy as np
 import pandas as pd
-import cv2
-from pathlib import Path
 import tensorflow as tf
 from tensorflow import keras
-from tensorflow.keras.preprocessing.image import ImageDataGenerator
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import LabelEncoder
 import pickle
+import contextlib
 import warnings
+from concurrent.futures import ThreadPoolExecutor, as_completed
 warnings.filterwarnings('ignore')
 
 # Add src to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
 
-from data_loader import IMAGES_DIR, CSV_FILE
+from data_loader import get_dataset_config, find_column, build_manifest
+from image_cache import ImageCache, FeatureCache, prune_caches
+from image_io import imread_resized, read_exif_orientation, HEADER_BYTES
+from dedup import find_near_duplicates, HAMMING_THRESHOLD
+import records
+import checkpoints
+import telemetry
+import model_bundle
+from manifest_store import ManifestStore, MANIFEST_DB
 
 # Configuration
 IMAGE_SIZE = (224, 224)  # Larger size for better feature extraction
@@ -30,45 +37,102 @@ EPOCHS = 15
 VALIDATION_SPLIT = 0.2
 TEST_SPLIT = 0.1
 MIN_IMAGES_PER_CLASS = 5  # Minimum images to include a class
+SAMPLE_SIZE = 20000  # Images kept in memory as uint8 (~3 GB at 224x224); None = all images
 RANDOM_STATE = 42
+NUM_WORKERS = min(8, os.cpu_count() or 1)  # Parallel image decoding threads (1 = sequential)
+LOAD_CHUNK_SIZE = 256  # Images decoded per worker task
+USE_IMAGE_CACHE = True  # Reuse resized images from the on-disk cache between runs
+USE_MANIFEST_STORE = True  # Query the incremental SQLite manifest instead of re-reading CSV + folder
 
 # Paths
 MODEL_DIR = 'models'
 MODEL_PATH = os.path.join(MODEL_DIR, 'food_model_trained.h5')
 ENCODER_PATH = os.path.join(MODEL_DIR, 'label_encoder.pkl')
 CLASSES_PATH = os.path.join(MODEL_DIR, 'classes.pkl')
+MANIFEST_PATH = os.path.join(MODEL_DIR, 'dataset_manifest.csv')
+DUPLICATES_REPORT_PATH = os.path.join(MODEL_DIR, 'near_duplicates.csv')
+RECORDS_DIR = 'records'  # Sharded TFRecord export (see export_records.py)
+CHECKPOINT_DIR = os.path.join(MODEL_DIR, 'checkpoints')  # Resumable training state (--resume)
+CHECKPOINT_EVERY_STEPS = 200  # Mid-epoch checkpoint interval in batches (0 = epoch ends only)
+TELEMETRY_PATH = os.path.join(MODEL_DIR, 'telemetry.jsonl')  # Phase/step timings with --telemetry
+REPLAY_PER_CLASS = 20  # Old-class images replayed per class when adding classes (--add-classes)
+INCREMENTAL_EPOCHS = 5
+INCREMENTAL_LEARNING_RATE = 1e-4
+BACKBONE_NAME = 'mobilenetv2'
+FEATURE_DIM = 1280  # MobileNetV2 pooled embedding size
+AUGMENTATION_VERSION = 2  # Part of the cache key of augmented embeddings: bump when build_augmentation changes
+DENSE_UNITS = (256, 128)  # Hidden layers of the classification head
+DROPOUT_RATES = (0.5, 0.3)  # Dropout after each hidden layer
+LEARNING_RATE = 1e-3
+# Training image size by epoch with --progressive-resize: (first epoch, (width, height));
+# validation, test and the saved model always use IMAGE_SIZE
+RESIZE_SCHEDULE = ((0, (128, 128)), (4, (160, 160)), (8, IMAGE_SIZE))
 
 def create_model_directory():
     """Create models directory if it doesn't exist"""
     os.makedirs(MODEL_DIR, exist_ok=True)
     print(f"✅ Models directory ready: {MODEL_DIR}")
 
-def load_and_prepare_data():
-    """Load CSV and filter images that exist"""
-    print("\n📊 Loading dataset...")
+def _print_class_stats(class_counts):
+    """Print the images-per-dish distribution"""
+    print(f"\n   Total unique dishes: {len(class_counts)}")
+    print(f"   Images per dish:")
+    print(f"     Min: {class_counts.min()}")
+    print(f"     Max: {class_counts.max()}")
+    print(f"     Mean: {class_counts.mean():.1f}")
+    print(f"     Median: {class_counts.median():.1f}")
+
+def _load_from_manifest_store(dataset):
+    """Refresh the SQLite manifest and query the valid images from it"""
+    store = ManifestStore(MANIFEST_DB)
+    try:
+        # CSV parse (only when it changed) + existence check of the image folder, timed separately
+        stats = store.refresh(dataset.csv_file, dataset.images_dir, phase=telemetry.phase)
+    except KeyError as e:
+        print(f"❌ Required columns not found!")
+        print(f"   {e}")
+        store.close()
+        return None, None, None
+    except Exception as e:
+        print(f"❌ Error loading CSV: {e}")
+        store.close()
+        return None, None, None
+    
+    title_col, image_col = store.columns
+    print(f"   Manifest: {MANIFEST_DB}")
+    print(f"     CSV {'re-read' if stats['csv_reloaded'] else 'unchanged'}; files: {stats['added']} new, "
+          f"{stats['changed']} changed, {stats['removed']} removed, {stats['unchanged']} unchanged")
+    print(f"   Using columns: title='{title_col}', image='{image_col}'")
     
+    valid_count, missing_count, failed_count = store.count_labelled()
+    print(f"   Found {valid_count} valid images")
+    print(f"   Missing {missing_count} images")
+    if failed_count:
+        print(f"   Skipped {failed_count} images that failed to decode")
+    
+    # Count images per class, then filter classes with minimum images (indexed queries)
+    _print_class_stats(store.class_counts())
+    with telemetry.phase('manifest_query'):
+        data_df = store.dataset(min_images_per_class=MIN_IMAGES_PER_CLASS)
+    store.close()
+    
+    os.makedirs(MODEL_DIR, exist_ok=True)
+    data_df.to_csv(MANIFEST_PATH, index=False)
+    return data_df, title_col, image_col
+
+def _load_from_csv(dataset):
+    """Read the CSV and match its rows against the image folder"""
     try:
-        df = pd.read_csv(CSV_FILE)
+        with telemetry.phase('csv_parse'):
+            df = pd.read_csv(dataset.csv_file)
         print(f"   Total records in CSV: {len(df)}")
     except Exception as e:
         print(f"❌ Error loading CSV: {e}")
         return None, None, None
     
     # Detect column names
-    cols_lower = {c.lower(): c for c in df.columns}
-    
-    def find_col(possible_names):
-        for name in possible_names:
-            if name.lower() in cols_lower:
-                return cols_lower[name.lower()]
-        for name in df.columns:
-            for p in possible_names:
-                if p.lower() in name.lower():
-                    return name
-        return None
-    
-    title_col = find_col(['title', 'name', 'dish', 'recipe'])
-    image_col = find_col(['image_name', 'imagename', 'image', 'image_id', 'file_name', 'filename'])
+    title_col = find_column(df, ['title', 'name', 'dish', 'recipe'])
+    image_col = find_column(df, ['image_name', 'imagename', 'image', 'image_id', 'file_name', 'filename'])
     
     if title_col is None or image_col is None:
         print(f"❌ Required columns not found!")
@@ -81,49 +145,44 @@ def load_and_prepare_data():
     df = df.dropna(subset=[image_col, title_col])
     df = df.drop_duplicates(subset=[image_col])
     
-    # Build list of valid image paths and labels
-    images_data = []
-    valid_count = 0
-    missing_count = 0
+    # Match rows to image files (one directory listing + join), saved for reuse
+    with telemetry.phase('existence_check'):
+        data_df = build_manifest(df, image_col, title_col, dataset.images_dir, output_path=MANIFEST_PATH)
     
-    for _, row in df.iterrows():
-        raw_img_name = str(row[image_col])
-        img_name = raw_img_name if raw_img_name.lower().endswith(('.jpg', '.jpeg', '.png')) else raw_img_name + ".jpg"
-        img_path = os.path.join(IMAGES_DIR, img_name)
-        
-        # Check if file exists
-        if os.path.exists(img_path):
-            images_data.append({
-                'path': img_path,
-                'label': row[title_col],
-                'filename': img_name
-            })
-            valid_count += 1
-        else:
-            missing_count += 1
-    
-    print(f"   Found {valid_count} valid images")
-    print(f"   Missing {missing_count} images")
-    
-    # Create DataFrame from valid images
-    data_df = pd.DataFrame(images_data)
+    print(f"   Found {len(data_df)} valid images")
+    print(f"   Missing {len(df) - len(data_df)} images")
     
     # Count images per class
     class_counts = data_df['label'].value_counts()
-    print(f"\n   Total unique dishes: {len(class_counts)}")
-    print(f"   Images per dish:")
-    print(f"     Min: {class_counts.min()}")
-    print(f"     Max: {class_counts.max()}")
-    print(f"     Mean: {class_counts.mean():.1f}")
-    print(f"     Median: {class_counts.median():.1f}")
+    _print_class_stats(class_counts)
     
     # Filter classes with minimum images
     valid_classes = class_counts[class_counts >= MIN_IMAGES_PER_CLASS].index.tolist()
     data_df = data_df[data_df['label'].isin(valid_classes)]
+    return data_df, title_col, image_col
+
+def load_and_prepare_data(use_store=USE_MANIFEST_STORE):
+    """Load CSV and filter images that exist"""
+    print("\n📊 Loading dataset...")
+    
+    try:
+        dataset = get_dataset_config()
+    except FileNotFoundError as e:
+        print(f"❌ Error loading CSV: {e}")
+        return None, None, None
+    
+    if use_store:
+        data_df, title_col, image_col = _load_from_manifest_store(dataset)
+    else:
+        data_df, title_col, image_col = _load_from_csv(dataset)
+    
+    if data_df is None:
+        return None, None, None
     
     print(f"\n   After filtering (min {MIN_IMAGES_PER_CLASS} images per class):")
-    print(f"     Classes: {len(valid_classes)}")
+    print(f"     Classes: {data_df['label'].nunique()}")
     print(f"     Total images: {len(data_df)}")
+    print(f"   Manifest saved: {MANIFEST_PATH}")
     
     if len(data_df) == 0:
         print("❌ No valid data after filtering!")
@@ -131,51 +190,666 @@ def load_and_prepare_data():
     
     return data_df, title_col, image_col
 
-def load_image(img_path):
-    """Load and preprocess image"""
+def report_near_duplicates(data_df, drop=False, threshold=HAMMING_THRESHOLD):
+    """Find near-duplicate photos (perceptual hash), save a report and optionally drop them"""
+    print(f"\n🔁 Looking for near-duplicate images (pHash, Hamming <= {threshold})...")
+    
+    report = find_near_duplicates(data_df, threshold=threshold, num_workers=NUM_WORKERS)
+    report.to_csv(DUPLICATES_REPORT_PATH, index=False)
+    cross_label = int((report['label'] != report['duplicate_label']).sum())
+    print(f"   Near-duplicates: {len(report)} ({cross_label} with a different label)")
+    print(f"   Report saved: {DUPLICATES_REPORT_PATH}")
+    
+    if not drop or len(report) == 0:
+        return data_df
+    
+    data_df = data_df[~data_df['path'].isin(report['path'])]
+    
+    # Dropping images can push a class below the minimum again
+    class_counts = data_df['label'].value_counts()
+    valid_classes = class_counts[class_counts >= MIN_IMAGES_PER_CLASS].index
+    data_df = data_df[data_df['label'].isin(valid_classes)]
+    print(f"   After dropping duplicates: {len(data_df)} images, {len(valid_classes)} classes")
+    return data_df
+
+def decode_image(img_path, image_size=IMAGE_SIZE):
+    """Load and resize image (BGR uint8); large JPEGs are decoded at reduced resolution"""
     try:
-        img = cv2.imread(img_path)
-        if img is None:
-            return None
-        # Resize and normalize
-        img = cv2.resize(img, IMAGE_SIZE)
-        img = img.astype('float32') / 255.0
-        return img
+        return imread_resized(img_path, image_size)
     except Exception as e:
         return None
 
-def load_images_batch(data_df, sample_size=None):
-    """Load images and labels"""
-    print("\n🖼️  Loading images into memory...")
+def _load_chunk(paths, X, start, cache=None):
+    """
+    Decode a chunk of images into X[start:start+len(paths)] (resized to the
+    image shape of X), return success and cache-hit masks
+    """
+    image_size = (X.shape[2], X.shape[1])
+    ok = np.zeros(len(paths), dtype=bool)
+    hits = np.zeros(len(paths), dtype=bool)
+    for i, path in enumerate(paths):
+        if cache is not None:
+            st = cache.stat(path)
+            hits[i], img = cache.get(path, st)
+            if not hits[i]:
+                img = decode_image(path, image_size)
+                cache.put(path, img, st)
+        else:
+            img = decode_image(path, image_size)
+        if img is not None:
+            X[start + i] = img
+            ok[i] = True
+    return start, ok, hits
+
+def decode_images(paths, num_workers=NUM_WORKERS, chunk_size=LOAD_CHUNK_SIZE, use_cache=USE_IMAGE_CACHE,
+                  mark_failed=USE_MANIFEST_STORE, image_size=IMAGE_SIZE):
+    """
+    Decode image files in parallel chunks into a preallocated uint8 array.
+    Returns (X [n, height, width, 3], success mask); failed rows are left empty.
+    """
+    n = len(paths)
     
-    if sample_size:
-        data_df = data_df.sample(min(sample_size, len(data_df)), random_state=RANDOM_STATE)
-        print(f"   Using sample of {len(data_df)} images")
+    # Kept as uint8; batches are normalized in the tf.data map of make_array_dataset
+    X = np.empty((n, image_size[1], image_size[0], 3), dtype='uint8')
+    ok = np.zeros(n, dtype=bool)
+    hits = 0
+    cache = ImageCache(image_size) if use_cache else None
+    chunks = [(paths[i:i + chunk_size], i) for i in range(0, n, chunk_size)]
+    workers = max(1, num_workers or 1)
+    print(f"   Decoding with {workers} worker(s), chunk size {chunk_size}")
     
-    X = []
-    y = []
-    failed = 0
+    done = 0
+    next_report = 1000
+    with telemetry.phase('decode', images=n, workers=workers), ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_load_chunk, chunk, X, start, cache) for chunk, start in chunks]
+        for future in as_completed(futures):
+            start, chunk_ok, chunk_hits = future.result()
+            ok[start:start + len(chunk_ok)] = chunk_ok
+            hits += int(chunk_hits.sum())
+            done += len(chunk_ok)
+            if done >= next_report:
+                loaded = int(ok.sum())
+                print(f"   Loaded {loaded} images... ({done - loaded} failed)")
+                next_report = (done // 1000 + 1) * 1000
+        if cache is not None:
+            cache.flush()
     
-    for idx, row in data_df.iterrows():
-        img = load_image(row['path'])
-        if img is not None:
-            X.append(img)
-            y.append(row['label'])
-        else:
-            failed += 1
-        
-        if (idx + 1) % 1000 == 0:
-            print(f"   Loaded {len(X)} images... ({failed} failed)")
+    if cache is not None:
+        print(f"   Cache hits: {hits}/{n} ({cache.root})")
     
-    print(f"   Successfully loaded: {len(X)} images")
+    loaded = int(ok.sum())
+    failed = n - loaded
+    print(f"   Successfully loaded: {loaded} images")
     print(f"   Failed to load: {failed} images")
-    
-    if len(X) == 0:
+    print(f"   Memory: {X.nbytes * loaded / max(n, 1) / 1024 ** 3:.2f} GB (uint8)")
+
+    # Workers of a --distributed run must all query the same rows: only
+    # single-process runs (such as the launcher's --prepare-only pass) flag failures
+    if failed and mark_failed and _worker[1] == 1:
+        # Remember undecodable files so the manifest query skips them next time
+        store = ManifestStore(MANIFEST_DB)
+        store.mark_failed([paths[i] for i in np.flatnonzero(~ok)])
+        store.close()
+    return X, ok
+
+def compact_rows(X, ok):
+    """Move the successful rows of X to the front in place (no second full-size copy)"""
+    keep = np.flatnonzero(ok)
+    for dst, src in enumerate(keep):
+        if dst != src:
+            X[dst] = X[src]
+    return X[:len(keep)]
+
+def load_images_batch(data_df, sample_size=None, num_workers=NUM_WORKERS, chunk_size=LOAD_CHUNK_SIZE,
+                      use_cache=USE_IMAGE_CACHE, mark_failed=USE_MANIFEST_STORE, image_size=IMAGE_SIZE):
+    """Load images and labels (decoded in parallel chunks into a preallocated array)"""
+    print("\n🖼️  Loading images into memory...")
+
+    data_df = sample_rows(data_df, sample_size)
+
+    labels = data_df['label'].to_numpy()
+    X, ok = decode_images(data_df['path'].tolist(), num_workers, chunk_size, use_cache, mark_failed, image_size)
+
+    if not ok.any():
         print("❌ No images loaded!")
         return None, None
+
+    if not ok.all():
+        X = compact_rows(X, ok)
+        labels = labels[ok]
+
+    return X, labels
+
+def build_augmentation(seed=None):
+    """Batched augmentation layers matching the ImageDataGenerator ranges"""
+    return keras.Sequential([
+        keras.layers.RandomFlip('horizontal', seed=seed),
+        keras.layers.RandomRotation(20 / 360, fill_mode='nearest', seed=seed),
+        keras.layers.RandomTranslation(0.2, 0.2, fill_mode='nearest', seed=seed),
+        # Height and width zoomed independently, like ImageDataGenerator's zoom_range
+        keras.layers.RandomZoom(0.2, width_factor=0.2, fill_mode='nearest', seed=seed),
+    ], name='augmentation')
+
+def augment_batch(images, seed):
+    """
+    The augmentation of build_augmentation as stateless ops on a batch: the
+    same seed (int64 [2]) always gives the same images, so batches can be
+    augmented in parallel and in any order. Random horizontal flip, then
+    rotation, shift and zoom as one affine transform (a single resampling).
+    """
+    flip_seed, affine_seed = tf.unstack(tf.random.experimental.stateless_split(seed, 2))
+    images = tf.image.stateless_random_flip_left_right(images, flip_seed)
+    height = tf.cast(tf.shape(images)[1], tf.float32)
+    width = tf.cast(tf.shape(images)[2], tf.float32)
+    # Per image: angle (+-20 degrees), shift (+-20% of the size) and zoom (+-20%, height and width independently)
+    angle, tx, ty, zx, zy = tf.unstack(tf.random.stateless_uniform([5, tf.shape(images)[0]], affine_seed, -1.0, 1.0))
+    angle *= 20 / 180 * np.pi
+    zx, zy = 1 + 0.2 * zx, 1 + 0.2 * zy
+    # Output pixel -> input pixel: zoom and rotate around the centre, then shift
+    a0, a1 = zx * tf.cos(angle), -zx * tf.sin(angle)
+    b0, b1 = zy * tf.sin(angle), zy * tf.cos(angle)
+    cx, cy = (width - 1) / 2, (height - 1) / 2
+    a2 = cx - a0 * cx - a1 * cy + 0.2 * tx * width
+    b2 = cy - b0 * cx - b1 * cy + 0.2 * ty * height
+    zeros = tf.zeros_like(angle)
+    transform = tf.stack([a0, a1, a2, b0, b1, b2, zeros, zeros], axis=1)
+    return keras.ops.image.affine_transform(images, transform, interpolation='bilinear', fill_mode='nearest')
+
+def _decode_jpeg_reduced(data):
+    """Decode a JPEG at 1/2, 1/4 or 1/8 scale when that still covers IMAGE_SIZE"""
+    shape = tf.image.extract_jpeg_shape(data)
+    short_side = tf.minimum(shape[0], shape[1])
+    needed = max(IMAGE_SIZE)
+    # ceil(short_side / ratio) >= needed  <=>  short_side > (needed - 1) * ratio
+    branch = tf.add_n([tf.cast(short_side > (needed - 1) * r, tf.int32) for r in (2, 4, 8)])
+    return tf.switch_case(branch, [
+        lambda r=r: tf.io.decode_jpeg(data, channels=3, ratio=r) for r in (1, 2, 4, 8)
+    ])
+
+def _apply_orientation(img, orientation):
+    """Turn a decoded image upright by its EXIF orientation (1-8), as cv2.imread does"""
+    return tf.switch_case(orientation - 1, [
+        lambda: img,
+        lambda: tf.image.flip_left_right(img),
+        lambda: tf.image.rot90(img, 2),
+        lambda: tf.image.flip_up_down(img),
+        lambda: tf.image.transpose(img),
+        lambda: tf.image.rot90(img, 3),
+        lambda: tf.image.rot90(tf.image.transpose(img), 2),
+        lambda: tf.image.rot90(img, 1),
+    ])
+
+def _decode_jpeg_upright(data):
+    """_decode_jpeg_reduced with the EXIF orientation applied (tf.io.decode_jpeg ignores it)"""
+    orientation = tf.numpy_function(lambda header: np.int32(read_exif_orientation(np.asarray(header).item())),
+                                    [tf.strings.substr(data, 0, HEADER_BYTES)], tf.int32, stateful=False)
+    return _apply_orientation(_decode_jpeg_reduced(data), orientation)
+
+def _decode_bytes(data, label):
+    """Decode encoded image bytes and resize (BGR, [0, 1], like decode_image / 255)"""
+    img = tf.cond(
+        tf.io.is_jpeg(data),
+        lambda: _decode_jpeg_upright(data),
+        lambda: tf.io.decode_image(data, channels=3, expand_animations=False)
+    )
+    img = tf.reverse(img, axis=[-1])  # RGB -> BGR to match cv2.imread
+    img = tf.image.resize(img, (IMAGE_SIZE[1], IMAGE_SIZE[0]))
+    return img / 255.0, label
+
+def _decode_and_resize(path, label):
+    """Read one image file lazily and resize it"""
+    return _decode_bytes(tf.io.read_file(path), label)
+
+class EpochOrder(keras.callbacks.Callback):
+    """
+    Epoch-keyed shuffle for the training pipelines.
+    
+    The order of epoch e depends only on (RANDOM_STATE, e) and the first
+    `skip` rows can be dropped, so a resumed run continues with exactly the
+    batches the interrupted run would have seen next. The augmentation of a
+    batch is seeded from (epoch, step) for the same reason.
+    """
+    
+    def __init__(self):
+        super().__init__()
+        self.epoch = tf.Variable(0, dtype=tf.int64, trainable=False)
+        self.skip = tf.Variable(0, dtype=tf.int64, trainable=False)
+
+    def permutation(self, n, skip=True):
+        """Dataset of range(n) in the order of the current epoch (read when iteration starts)"""
+        def rows(_):
+            seed = tf.stack([tf.constant(RANDOM_STATE, tf.int64), self.epoch])
+            order = tf.argsort(tf.random.stateless_uniform([n], seed=seed))
+            return tf.data.Dataset.from_tensor_slices(order[self.skip:] if skip else order)
+        return tf.data.Dataset.range(1).flat_map(rows)
+    
+    def skipped(self, ds):
+        """ds without its first `skip` elements (for pipelines that drop rows after the permutation)"""
+        return tf.data.Dataset.range(1).flat_map(lambda _: ds.skip(self.skip))
+    
+    def batch_seed(self, step):
+        """Stateless seed of augment_batch for the batch at `step` of this epoch (and of this worker)"""
+        step = tf.cast(step, tf.int64) + self.skip // BATCH_SIZE
+        index, num_workers = _worker
+        return tf.stack([(RANDOM_STATE + self.epoch) * num_workers + index, step])
+    
+    def on_epoch_begin(self, epoch, logs=None):
+        self.epoch.assign(epoch)
+    
+    def on_epoch_end(self, epoch, logs=None):
+        self.skip.assign(0)
+
+_epoch_order = None
+
+def epoch_order():
+    """EpochOrder shared by the training pipelines and train_model (created on first use)"""
+    global _epoch_order
+    if _epoch_order is None:
+        _epoch_order = EpochOrder()
+    return _epoch_order
+
+class ProgressiveResize(keras.callbacks.Callback):
+    """
+    Progressive resizing: train the first epochs on smaller images.
+    
+    The training pipelines resize each batch to `size`, which is read when the
+    batch is produced, so the schedule can change it between epochs without
+    rebuilding the dataset (the model input is size-agnostic).
+    """
+    
+    def __init__(self, schedule=RESIZE_SCHEDULE):
+        super().__init__()
+        self.schedule = sorted(schedule)
+        self.size = tf.Variable([IMAGE_SIZE[1], IMAGE_SIZE[0]], dtype=tf.int32, trainable=False)
+        self.current = None
+    
+    def size_at(self, epoch):
+        """(width, height) of the training images in an epoch"""
+        size = IMAGE_SIZE
+        for first_epoch, stage_size in self.schedule:
+            if epoch >= first_epoch:
+                size = stage_size
+        return size
+    
+    def resize(self, x):
+        """Resize a batch of images to the current size (no-op at full size)"""
+        return tf.cond(
+            tf.reduce_all(tf.shape(x)[1:3] == self.size),
+            lambda: x,
+            lambda: tf.image.resize(x, self.size)
+        )
+    
+    def on_epoch_begin(self, epoch, logs=None):
+        size = self.size_at(epoch)
+        if size != self.current:
+            print(f"\n   📐 Training images: {size[0]}x{size[1]}")
+            self.current = size
+        self.size.assign([size[1], size[0]])
+
+_progressive_resize = None  # ProgressiveResize when --progressive-resize is on
+
+def enable_progressive_resize(schedule=RESIZE_SCHEDULE):
+    """Turn on progressive resizing for the training pipelines built afterwards"""
+    global _progressive_resize
+    _progressive_resize = ProgressiveResize(schedule)
+    return _progressive_resize
+
+_worker = (0, 1)  # (index, count) of this process in --distributed training
+
+def setup_distributed(threads=0):
+    """
+    Create the MultiWorkerMirroredStrategy described by TF_CONFIG.
+    Must run before any other TensorFlow op of the process.
+    """
+    global _worker
+    if threads:
+        tf.config.threading.set_intra_op_parallelism_threads(threads)
+    strategy = tf.distribute.MultiWorkerMirroredStrategy()
+    cluster = strategy.cluster_resolver.cluster_spec().as_dict()
+    num_workers = sum(len(cluster.get(job, [])) for job in ('chief', 'worker')) or 1
+    task_index = strategy.cluster_resolver.task_id or 0
+    if strategy.cluster_resolver.task_type == 'worker' and 'chief' in cluster:
+        task_index += len(cluster['chief'])
+    _worker = (task_index, num_workers)
+    return strategy
+
+def global_batch_size():
+    """Images per training step across all workers (each worker's pipeline batches BATCH_SIZE)"""
+    return BATCH_SIZE * _worker[1]
+
+def is_chief():
+    """Only the first worker writes checkpoints and artifacts"""
+    return _worker[0] == 0
+
+def shard_rows(indices):
+    """
+    Rows of `indices` that this --distributed worker trains / evaluates on: a
+    fixed (seeded) shard, the same size for every worker so they all run the
+    same steps; the few rows left over are dropped. All rows in one process.
+    """
+    index, num_workers = _worker
+    indices = np.asarray(indices)
+    if num_workers == 1:
+        return indices
+    order = np.random.default_rng(RANDOM_STATE).permutation(len(indices))
+    order = order[:len(order) // num_workers * num_workers][index::num_workers]
+    return np.sort(indices[order])
+
+def _keep_loaded(rows, ok):
+    """
+    The rows that loaded. With --distributed the shard is filled back up to its
+    size with repeated rows, so a worker with unreadable files does not run
+    fewer steps than the others.
+    """
+    kept = rows[ok]
+    if _worker[1] > 1 and 0 < len(kept) < len(rows):
+        print(f"   ⚠️  {len(rows) - len(kept)} image(s) of this worker's shard failed: repeating others in their place")
+        kept = np.resize(kept, len(rows))
+    return kept
+
+class DistributedTrainer:
+    """
+    Training loop for --distributed: the tf.distribute custom training loop
+    (strategy.run per step, gradients all-reduced by the optimizer, loss and
+    accuracy totals summed over the workers with strategy.reduce) driving the
+    usual Keras callbacks. Keras 3's fit() does not support
+    MultiWorkerMirroredStrategy.
+
+    Each worker feeds its own shard (shard_rows) in batches of BATCH_SIZE.
+    """
+
+    def __init__(self, model, strategy, throughput=None):
+        self.model = model
+        self.strategy = strategy
+        self.throughput = throughput
+        self.loss = keras.losses.SparseCategoricalCrossentropy(reduction=None)
+        self._train_step = tf.function(self._distributed(self._train_replica), reduce_retracing=True)
+        self._test_step = tf.function(self._distributed(self._test_replica), reduce_retracing=True)
+
+    def _distributed(self, replica_step):
+        def step(batch):
+            totals = self.strategy.run(replica_step, args=batch)
+            return self.strategy.reduce('SUM', totals, axis=None)
+        return step
+
+    def _totals(self, y, probs, per_image):
+        """[summed loss, correct predictions, images] of a batch"""
+        correct = tf.cast(tf.equal(tf.argmax(probs, axis=-1, output_type=tf.int32), tf.cast(y, tf.int32)), tf.float32)
+        return tf.stack([tf.reduce_sum(per_image), tf.reduce_sum(correct), tf.cast(tf.shape(y)[0], tf.float32)])
+
+    def _train_replica(self, x, y):
+        with tf.GradientTape() as tape:
+            probs = self.model(x, training=True)
+            per_image = self.loss(y, probs)
+            # Mean over the global batch: the optimizer sums the gradients of the workers
+            loss = tf.nn.compute_average_loss(per_image)
+        variables = self.model.trainable_variables
+        self.model.optimizer.apply_gradients(zip(tape.gradient(loss, variables), variables))
+        return self._totals(y, probs, per_image)
+
+    def _test_replica(self, x, y):
+        probs = self.model(x, training=False)
+        return self._totals(y, probs, self.loss(y, probs))
+
+    @staticmethod
+    def _logs(totals, prefix=''):
+        loss, correct, images = (float(v) for v in totals)
+        images = max(images, 1.0)
+        return {f'{prefix}loss': loss / images, f'{prefix}accuracy': correct / images}
+
+    def _run(self, data, step, callbacks=None):
+        """Run a step function over every batch of data; returns the summed totals"""
+        totals = np.zeros(3)
+        # The batch is fetched after on_train_batch_begin: the fetch is the data wait of the step
+        batches = iter(self.strategy.distribute_datasets_from_function(lambda _: data))
+        i = 0
+        while True:
+            if callbacks is not None:
+                callbacks.on_train_batch_begin(i)
+            batch = batches.get_next_as_optional()
+            if not batch.has_value():
+                break
+            batch = batch.get_value()
+            if callbacks is not None and self.throughput is not None:
+                # Shards are the same size on every worker, so are their batches
+                local = sum(int(tf.shape(x)[0]) for x in self.strategy.experimental_local_results(batch[0]))
+                self.throughput.arrived(local * _worker[1])
+            totals += step(batch).numpy()
+            if callbacks is not None:
+                callbacks.on_train_batch_end(i, self._logs(totals))
+            i += 1
+        return totals
+
+    def fit(self, train_data, epochs, initial_epoch=0, validation_data=None, callbacks=None, verbose=1):
+        """model.fit() on the distributed loop: same callbacks, returns the History"""
+        history = keras.callbacks.History()
+        callbacks = keras.callbacks.CallbackList(
+            list(callbacks or []) + [history], add_progbar=verbose != 0, model=self.model,
+            verbose=verbose, epochs=epochs, steps=None
+        )
+        self.model.stop_training = False
+        logs = {}
+        callbacks.on_train_begin()
+        for epoch in range(initial_epoch, epochs):
+            callbacks.on_epoch_begin(epoch)
+            logs = self._logs(self._run(train_data, self._train_step, callbacks))
+            if validation_data is not None:
+                logs.update(self._logs(self._run(validation_data, self._test_step), 'val_'))
+            callbacks.on_epoch_end(epoch, logs)
+            if self.model.stop_training:
+                break
+        callbacks.on_train_end(logs)
+        return history
+
+    def evaluate(self, data, verbose=0):
+        """model.evaluate(): [loss, accuracy] over the shards of all workers"""
+        logs = self._logs(self._run(data, self._test_step))
+        return [logs['loss'], logs['accuracy']]
+
+def _rows(arrays, training, skip=True):
+    """Dataset over the rows of small arrays; training rows come in the epoch-keyed order"""
+    if not training:
+        return tf.data.Dataset.from_tensor_slices(arrays)
+    rows = epoch_order().permutation(len(arrays[0]), skip)
+    return rows.map(lambda i: tuple(tf.gather(a, i) for a in arrays))
+
+def make_stream_dataset(paths, labels, training=False):
+    """tf.data pipeline that decodes, resizes and augments files on the fly"""
+    # Unreadable files are dropped in the pipeline, so the rows of a resumed
+    # run are skipped after that (see _batch_dataset) rather than here
+    ds = _rows((np.asarray(paths, dtype=str), np.asarray(labels, dtype='int32')), training, skip=False)
+    ds = ds.map(_decode_and_resize, num_parallel_calls=tf.data.AUTOTUNE, deterministic=True)
+    return _batch_dataset(ds, training, resume_skip=training)
+
+def make_record_dataset(record_dir, split, training=False):
+    """tf.data pipeline streaming one split from sharded TFRecord files (this worker's share with --distributed)"""
+    index, num_workers = _worker
+    ds = records.read_split(record_dir, split, training=training, seed=RANDOM_STATE,
+                            num_shards=num_workers, shard=index)
+    ds = ds.map(_decode_bytes, num_parallel_calls=tf.data.AUTOTUNE, deterministic=not training)
+    return _batch_dataset(ds, training)
+
+def make_array_dataset(X, labels, indices, training=False):
+    """
+    tf.data pipeline over the in-memory uint8 image array.
+    
+    Only indices go through the pipeline: each batch is gathered from X in one
+    vectorized read, normalized and augmented as a whole batch in parallel.
+    Integer labels are fed as int32; other label arrays (e.g. soft targets)
+    keep their dtype and row shape.
+    """
+    labels = np.asarray(labels)
+    if labels.dtype.kind in 'iu':
+        labels = labels.astype('int32')
+    ds = _rows((np.asarray(indices, dtype='int64'),), training)
+    ds = ds.batch(BATCH_SIZE)
+    
+    def gather(ids):
+        ids = np.sort(ids)  # Sequential reads; the batch order does not matter
+        return X[ids], labels[ids]
+    
+    def load(ids):
+        x, y = tf.numpy_function(gather, [ids], (tf.uint8, tf.as_dtype(labels.dtype)))
+        x.set_shape((None,) + X.shape[1:])
+        y.set_shape((None,) + labels.shape[1:])
+        return tf.cast(x, tf.float32) / 255.0, y
+    
+    ds = ds.map(load, num_parallel_calls=tf.data.AUTOTUNE, deterministic=True)
+    return _augment_and_prefetch(ds, training)
+
+def _batch_dataset(ds, training, resume_skip=False):
+    """Batch, augment and prefetch decoded (image, integer label) elements"""
+    # Unreadable files are skipped, like failed images in load_images_batch
+    ds = ds.ignore_errors()
+    if resume_skip:
+        # The skipped rows are counted after the unreadable ones are dropped,
+        # like the batches the interrupted run trained on
+        ds = epoch_order().skipped(ds)
+    ds = ds.batch(BATCH_SIZE)
+    return _augment_and_prefetch(ds, training)
+
+def _augment_and_prefetch(ds, training):
+    """Apply the augmentation layers to whole batches (training only) and prefetch"""
+    if training:
+        if _progressive_resize is not None:
+            ds = ds.map(lambda x, y: (_progressive_resize.resize(x), y), num_parallel_calls=tf.data.AUTOTUNE)
+        def augment(step, batch):
+            return augment_batch(batch[0], epoch_order().batch_seed(step)), batch[1]
+        
+        # Every batch has its own stateless seed, so parallel calls stay reproducible
+        ds = ds.enumerate().map(augment, num_parallel_calls=tf.data.AUTOTUNE)
+    return ds.prefetch(tf.data.AUTOTUNE)
+
+def compute_features(paths, backbone, variant=0, num_workers=NUM_WORKERS, chunk_size=LOAD_CHUNK_SIZE):
+    """
+    Backbone embeddings for image files, reusing the on-disk feature cache.
     
-    X = np.array(X, dtype='float32')
-    return X, np.array(y)
+    Variant 0 embeds the plain images; variants > 0 embed a fixed random
+    augmentation of each image, so augmented epochs can also be served from
+    the cache. Returns (features float16 [n, FEATURE_DIM], success mask).
+    """
+    cache = FeatureCache(BACKBONE_NAME, IMAGE_SIZE, FEATURE_DIM, variant, AUGMENTATION_VERSION)
+    augment = build_augmentation(seed=RANDOM_STATE + variant) if variant else None
+    return predict_cached(paths, backbone, cache, augment, f'Variant {variant}', 'embed',
+                          num_workers=num_workers, chunk_size=chunk_size)
+
+def predict_cached(paths, model, cache, augment=None, name='Images', phase='predict',
+                   num_workers=NUM_WORKERS, chunk_size=LOAD_CHUNK_SIZE):
+    """
+    Outputs of `model` on IMAGE_SIZE images for image files, stored in an
+    array cache: only the files missing from it are decoded and predicted.
+    Returns (outputs [n, *cache.item_shape] in the cache dtype, success mask).
+    """
+    outputs = np.zeros((len(paths),) + cache.item_shape, dtype=cache.dtype)
+    ok = np.zeros(len(paths), dtype=bool)
+    
+    misses = []
+    for i, path in enumerate(paths):
+        st = cache.stat(path)
+        hit, vec = cache.get(path, st)
+        if not hit:
+            misses.append((i, st))
+        elif vec is not None:
+            outputs[i] = vec
+            ok[i] = True
+    print(f"   {name}: {len(paths) - len(misses)} cached, {len(misses)} to compute")
+    if not misses:
+        return outputs, ok
+    
+    image_cache = ImageCache(IMAGE_SIZE) if USE_IMAGE_CACHE else None
+    chunks = [misses[i:i + chunk_size] for i in range(0, len(misses), chunk_size)]
+    
+    def decode(chunk):
+        X = np.zeros((len(chunk), IMAGE_SIZE[1], IMAGE_SIZE[0], 3), dtype=np.uint8)
+        _, decoded, _ = _load_chunk([paths[i] for i, _ in chunk], X, 0, image_cache)
+        return chunk, X, decoded
+    
+    # Decoding runs on the thread pool while the model predicts finished chunks
+    with telemetry.phase(phase, images=len(misses)), ThreadPoolExecutor(max_workers=max(1, num_workers)) as pool:
+        for future in as_completed([pool.submit(decode, c) for c in chunks]):
+            chunk, X, decoded = future.result()
+            batch = X[decoded].astype('float32') / 255.0
+            if augment is not None and len(batch):
+                batch = augment(batch, training=True)
+            pred = model.predict(batch, batch_size=BATCH_SIZE, verbose=0) if len(batch) else []
+            rows = iter(pred)
+            for (i, st), good in zip(chunk, decoded):
+                vec = next(rows).astype(cache.dtype) if good else None
+                cache.put(paths[i], vec, st)
+                if good:
+                    outputs[i] = vec
+                    ok[i] = True
+    
+    cache.flush()
+    if image_cache is not None:
+        image_cache.flush()
+    return outputs, ok
+
+def make_feature_dataset(features, labels, training=False, batch_size=None):
+    """tf.data pipeline over cached embeddings (batches gathered by index, like make_array_dataset)"""
+    ds = _rows((np.arange(len(features)),), training).batch(batch_size or BATCH_SIZE)
+    
+    def gather(ids):
+        return features[ids], labels[ids].astype('int32')
+    
+    def load(ids):
+        f, y = tf.numpy_function(gather, [ids], (tf.float16, tf.int32))
+        f.set_shape((None, FEATURE_DIM))
+        y.set_shape((None,))
+        return tf.cast(f, tf.float32), y
+    
+    return ds.map(load, num_parallel_calls=tf.data.AUTOTUNE).prefetch(tf.data.AUTOTUNE)
+
+def sample_rows(data_df, sample_size):
+    """The rows a run trains on: a seeded sample of sample_size rows (all rows if None)"""
+    if sample_size:
+        data_df = data_df.sample(min(sample_size, len(data_df)), random_state=RANDOM_STATE)
+        print(f"   Using sample of {len(data_df)} images")
+    return data_df
+
+def split_record(data_df, train_idx, val_idx, test_idx):
+    """
+    Split of a run as saved with its checkpoint: the row indices plus the path
+    and label of every row they index, so a resumed run (or distill.py) gets
+    the same rows even when the dataset returns other ones by then.
+    """
+    return {'train': train_idx, 'val': val_idx, 'test': test_idx,
+            'paths': data_df['path'].to_numpy().astype(str),
+            'labels': data_df['label'].to_numpy().astype(str)}
+
+def saved_rows(splits):
+    """The rows a saved split indexes (see split_record)"""
+    return pd.DataFrame({'path': splits['paths'], 'label': splits['labels']})
+
+def load_saved_splits(classes):
+    """
+    Rows and train/val/test indices of the run that trained the saved model,
+    read from its finished checkpoint: (data_df, splits), or None if the
+    checkpoint is missing, unfinished, for other classes or has no saved split
+    (--records runs take their split from export_records.py).
+    """
+    state = checkpoints.load_checkpoint(CHECKPOINT_DIR)
+    if (state is None or state['splits'] is None or not state['finished']
+            or state.get('classes') != [str(c) for c in classes]):
+        return None
+    return saved_rows(state['splits']), state['splits']
+
+def split_indices(labels, saved=None):
+    """Stratified train/validation/test split of row indices (no data is copied)"""
+    if saved is not None:
+        # Resumed run: reuse the split of the checkpoint (indices into saved_rows)
+        return saved['train'], saved['val'], saved['test']
+    indices = np.arange(len(labels))
+    with telemetry.phase('split'):
+        # First split: training+validation vs test
+        temp_idx, test_idx = train_test_split(
+            indices, test_size=TEST_SPLIT, random_state=RANDOM_STATE, stratify=labels
+        )
+        # Second split: training vs validation
+        train_idx, val_idx = train_test_split(
+            temp_idx, test_size=VALIDATION_SPLIT, random_state=RANDOM_STATE, stratify=labels[temp_idx]
+        )
+    return train_idx, val_idx, test_idx
 
 def encode_labels(y_train, y_test=None):
     """Encode labels to integers"""
@@ -188,35 +862,70 @@ def encode_labels(y_train, y_test=None):
     
     return y_train_encoded, le
 
-def build_model(num_classes):
-    """Build CNN model using transfer learning"""
-    print("\n🏗️  Building model...")
-    
+def build_base_model():
+    """Frozen MobileNetV2 feature extractor (no top)"""
     # Use MobileNetV2 as base (faster, lighter than ResNet)
+    # Size-agnostic input (pooled afterwards): progressive resizing feeds smaller images
     base_model = keras.applications.MobileNetV2(
-        input_shape=(IMAGE_SIZE[0], IMAGE_SIZE[1], 3),
+        input_shape=(None, None, 3),
         include_top=False,
         weights='imagenet'
     )
     
     # Freeze base model weights
     base_model.trainable = False
+    return base_model
+
+def head_layers(num_classes, units=DENSE_UNITS, dropout=DROPOUT_RATES):
+    """Classification layers trained on top of the pooled backbone features"""
+    layers = []
+    for width, rate in zip(units, dropout):
+        layers.append(keras.layers.Dense(width, activation='relu'))
+        layers.append(keras.layers.Dropout(rate))
+    layers.append(keras.layers.Dense(num_classes, activation='softmax'))
+    return layers
+
+def build_backbone():
+    """Frozen backbone + pooling: image -> FEATURE_DIM embedding"""
+    return keras.Sequential([
+        keras.layers.Input(shape=(IMAGE_SIZE[0], IMAGE_SIZE[1], 3)),
+        build_base_model(),
+        keras.layers.GlobalAveragePooling2D(),
+    ], name='backbone')
+
+def build_head(num_classes, units=DENSE_UNITS, dropout=DROPOUT_RATES, learning_rate=LEARNING_RATE):
+    """Dense head alone, trained on cached embeddings"""
+    head = keras.Sequential(
+        [keras.layers.Input(shape=(FEATURE_DIM,))] + head_layers(num_classes, units, dropout), name='head'
+    )
+    head.compile(
+        optimizer=keras.optimizers.Adam(learning_rate),
+        loss='sparse_categorical_crossentropy',
+        metrics=['accuracy']
+    )
+    return head
+
+def build_model(num_classes, head=None):
+    """Build CNN model using transfer learning (optionally with the weights of a trained head)"""
+    print("\n🏗️  Building model...")
+    
+    base_model = build_base_model()
     
     # Add custom layers
+    top = head_layers(num_classes)
     model = keras.Sequential([
-        keras.layers.Input(shape=(IMAGE_SIZE[0], IMAGE_SIZE[1], 3)),
+        keras.layers.Input(shape=(None, None, 3)),
         base_model,
         keras.layers.GlobalAveragePooling2D(),
-        keras.layers.Dense(256, activation='relu'),
-        keras.layers.Dropout(0.5),
-        keras.layers.Dense(128, activation='relu'),
-        keras.layers.Dropout(0.3),
-        keras.layers.Dense(num_classes, activation='softmax')
-    ])
+    ] + top)
+    
+    if head is not None:
+        for layer, trained in zip(top, head.layers):
+            layer.set_weights(trained.get_weights())
     
     model.compile(
-        optimizer='adam',
-        loss='categorical_crossentropy',
+        optimizer=keras.optimizers.Adam(LEARNING_RATE),
+        loss='sparse_categorical_crossentropy',  # integer labels: O(N) instead of an N x C one-hot matrix
         metrics=['accuracy']
     )
     
@@ -225,23 +934,41 @@ def build_model(num_classes):
     
     return model
 
-def train_model(model, X_train, y_train, X_val, y_val):
-    """Train the model"""
-    print("\n🚀 Training model...")
+def extend_classifier(model, old_classes, classes):
+    """
+    Copy of model whose softmax layer covers `classes` (sorted, a superset of
+    old_classes). The weights of every old class are kept at its new position;
+    the new columns start from a fresh initialization.
+    """
+    output = model.layers[-1]
+    kernel, bias = output.get_weights()
+    if kernel.shape[1] != len(old_classes):
+        raise ValueError(f"Model has {kernel.shape[1]} outputs but the encoder {len(old_classes)} classes")
     
-    # Convert to categorical
-    y_train_cat = keras.utils.to_categorical(y_train)
-    y_val_cat = keras.utils.to_categorical(y_val)
-    
-    # Data augmentation
-    datagen = ImageDataGenerator(
-        rotation_range=20,
-        width_shift_range=0.2,
-        height_shift_range=0.2,
-        horizontal_flip=True,
-        zoom_range=0.2,
-        fill_mode='nearest'
-    )
+    new_output = keras.layers.Dense(len(classes), activation='softmax', name=f'predictions_{len(classes)}')
+    extended = keras.Sequential([keras.layers.Input(shape=model.input_shape[1:])] + model.layers[:-1] + [new_output])
+    
+    new_kernel, new_bias = new_output.get_weights()
+    position = {c: i for i, c in enumerate(classes)}
+    columns = [position[c] for c in old_classes]
+    new_kernel[:, columns] = kernel
+    new_bias[columns] = bias
+    new_output.set_weights([new_kernel, new_bias])
+    return extended
+
+def with_preprocessing(model, image_size=IMAGE_SIZE):
+    """
+    Serving model that takes raw BGR uint8 images of any size [n, h, w, 3]:
+    the resize to image_size and the rescaling to [0, 1] run as layers in the graph
+    """
+    image = keras.layers.Input(shape=(None, None, 3), dtype='uint8', name='image')
+    x = keras.layers.Resizing(image_size[1], image_size[0], interpolation='bilinear')(image)
+    x = keras.layers.Rescaling(1 / 255.0)(x)
+    return keras.Model(image, model(x, training=False), name=f'{model.name}_raw_input')
+
+def train_model(model, train_data, val_data, resume=None, metadata=None, step_checkpoints=True, strategy=None):
+    """Train the model (from a checkpoint state when resume is given; on the workers of strategy with --distributed)"""
+    print("\n🚀 Training model...")
     
     # Callbacks
     early_stop = keras.callbacks.EarlyStopping(
@@ -257,31 +984,76 @@ def train_model(model, X_train, y_train, X_val, y_val):
         min_lr=1e-7
     )
     
+    callbacks = [early_stop, reduce_lr, epoch_order()]
+    if _progressive_resize is not None:
+        callbacks.append(_progressive_resize)
+    throughput = None
+    if isinstance(train_data, tf.data.Dataset):
+        # Data wait vs compute, images/s and peak RSS per step (recorded with --telemetry)
+        throughput = telemetry.ThroughputMonitor(global_batch_size())
+        if strategy is None:
+            throughput.wrap_step(model)
+        callbacks.append(throughput)
+    
+    # Checkpoints go last: they restore the state the callbacks above reset on train begin
+    initial_epoch = 0
+    if resume:
+        initial_epoch = resume['epoch']
+        epoch_order().skip.assign(resume['step'] * BATCH_SIZE)
+    if is_chief():
+        callbacks.append(checkpoints.TrainingCheckpoint(
+            CHECKPOINT_DIR,
+            {'early_stop': early_stop, 'reduce_lr': reduce_lr},
+            EPOCHS,
+            every_steps=CHECKPOINT_EVERY_STEPS if step_checkpoints else 0,
+            random_state=RANDOM_STATE,
+            metadata=metadata,
+            restore=resume
+        ))
+    keras.utils.set_random_seed(resume['random_state'] if resume else RANDOM_STATE)
+    fit = model.fit if strategy is None else DistributedTrainer(model, strategy, throughput).fit
+
+    if resume and resume['step']:
+        # Finish the interrupted epoch in its own fit() so Keras does not take
+        # its shorter length as the size of the following epochs
+        fit(
+            train_data,
+            epochs=initial_epoch + 1,
+            initial_epoch=initial_epoch,
+            validation_data=val_data,
+            callbacks=callbacks,
+            verbose=1
+        )
+        initial_epoch += 1
+        if model.stop_training:
+            return model.history
+    
     # Train
-    history = model.fit(
-        datagen.flow(X_train, y_train_cat, batch_size=BATCH_SIZE),
+    history = fit(
+        train_data,
         epochs=EPOCHS,
-        validation_data=(X_val, y_val_cat),
-        callbacks=[early_stop, reduce_lr],
+        initial_epoch=initial_epoch,
+        validation_data=val_data,
+        callbacks=callbacks,
         verbose=1
     )
     
     return history
 
-def evaluate_model(model, X_test, y_test):
+def evaluate_model(model, test_data, strategy=None):
     """Evaluate model on test set"""
     print("\n📊 Evaluating model on test set...")
-    
-    y_test_cat = keras.utils.to_categorical(y_test)
-    loss, accuracy = model.evaluate(X_test, y_test_cat, verbose=0)
-    
+
+    evaluate = model.evaluate if strategy is None else DistributedTrainer(model, strategy).evaluate
+    loss, accuracy = evaluate(test_data, verbose=0)
+
     print(f"   Test Loss: {loss:.4f}")
     print(f"   Test Accuracy: {accuracy*100:.2f}%")
     
     return accuracy
 
-def save_model_and_artifacts(model, le, classes):
-    """Save trained model and supporting artifacts"""
+def save_model_and_artifacts(model, le, classes, metadata=None):
+    """Save trained model and supporting artifacts (also as a new versioned model bundle)"""
     print("\n💾 Saving model...")
     
     # Save model
@@ -298,76 +1070,431 @@ def save_model_and_artifacts(model, le, classes):
         pickle.dump(list(classes), f)
     print(f"   ✅ Classes saved: {CLASSES_PATH}")
     
+    # Model + manifest (classes, input size, preprocessing, checksums) for serving
+    metadata = dict(metadata or {}, tensorflow=tf.__version__, keras=keras.__version__)
+    bundle = model_bundle.write_bundle({'keras': MODEL_PATH}, classes, IMAGE_SIZE, name='full', metadata=metadata)
+    print(f"   ✅ Model bundle saved: {bundle}")
+    
     print(f"\n✨ Model artifacts ready for production use!")
 
-def main():
+def prepare_in_memory(data_df, sample_size, splits=None):
+    """
+    Split the rows, load their images into RAM (uint8) and build batched
+    tf.data pipelines over the splits. With --distributed each worker only
+    decodes the rows of its own shard of every split.
+    """
+    if splits is None:
+        data_df = sample_rows(data_df, sample_size)
+
+    y = data_df['label'].to_numpy()
+    y_enc, le = encode_labels(y)
+    
+    print(f"\n✂️  Splitting data...")
+    train_idx, val_idx, test_idx = split_indices(y, splits)
+    splits = split_record(data_df, train_idx, val_idx, test_idx)
+
+    # Rows of this process, each split in one contiguous block of X
+    parts = [shard_rows(idx) for idx in (train_idx, val_idx, test_idx)]
+    rows = np.concatenate(parts)
+    print("\n🖼️  Loading images into memory...")
+    if _worker[1] > 1:
+        print(f"   Worker {_worker[0] + 1}/{_worker[1]}: {len(rows)} of {len(y)} images")
+    X, ok = decode_images(data_df['path'].to_numpy()[rows].tolist())
+    if not ok.any():
+        print("❌ No images loaded!")
+        return None
+
+    # Positions in X of the rows that loaded (X is compacted below)
+    positions = np.cumsum(ok) - 1
+    blocks = np.split(np.arange(len(rows)), np.cumsum([len(p) for p in parts])[:-1])
+    local = [positions[_keep_loaded(block, ok[block])] for block in blocks]
+    X = compact_rows(X, ok)
+    labels = y_enc[rows][ok]
+
+    # Batches are gathered from X and augmented in the tf.data pipeline
+    train_data = make_array_dataset(X, labels, local[0], training=True)
+    val_data = make_array_dataset(X, labels, local[1])
+    test_data = make_array_dataset(X, labels, local[2])
+    sizes = tuple(int(ok[block].sum()) for block in blocks) if _worker[1] == 1 else \
+        (len(train_idx), len(val_idx), len(test_idx))
+    return train_data, val_data, test_data, le, sizes, splits
+
+def prepare_streaming(data_df, sample_size, splits=None):
+    """Split file paths and build tf.data pipelines that read images lazily"""
+    print("\n🌊 Streaming images from disk (tf.data)...")
+    
+    if splits is None:
+        data_df = sample_rows(data_df, sample_size)
+    
+    paths = data_df['path'].to_numpy()
+    y = data_df['label'].to_numpy()
+    y_enc, le = encode_labels(y)
+    
+    print(f"\n✂️  Splitting data...")
+    train_idx, val_idx, test_idx = split_indices(y, splits)
+    splits = split_record(data_df, train_idx, val_idx, test_idx)
+    
+    train_data = make_stream_dataset(paths[train_idx], y_enc[train_idx], training=True)
+    val_data = make_stream_dataset(paths[val_idx], y_enc[val_idx])
+    test_data = make_stream_dataset(paths[test_idx], y_enc[test_idx])
+    return train_data, val_data, test_data, le, (len(train_idx), len(val_idx), len(test_idx)), splits
+
+def prepare_records(record_dir):
+    """Stream the splits written by export_records.py"""
+    print(f"\n📦 Streaming sharded records from {record_dir}...")
+    
+    index = records.read_index(record_dir)
+    le = LabelEncoder()
+    le.fit(index['classes'])
+    splits = index['splits']
+    print(f"   Shards: " + ", ".join(f"{name}={len(s['files'])}" for name, s in splits.items()))
+    
+    train_data = make_record_dataset(record_dir, 'train', training=True)
+    val_data = make_record_dataset(record_dir, 'val')
+    test_data = make_record_dataset(record_dir, 'test')
+    sizes = (splits['train']['count'], splits['val']['count'], splits['test']['count'])
+    return train_data, val_data, test_data, le, sizes, None
+
+def load_feature_splits(data_df, sample_size, variants=1, splits=None):
+    """
+    Embed every image once with the frozen backbone (cached on disk) and split.
+    Returns ({'train': (x, y), 'val': (x, y), 'test': (x, y)}, label encoder,
+    split row indices); failed images are left out. With --distributed only
+    this worker's shard of every split is embedded and returned.
+    """
+    if splits is None:
+        data_df = sample_rows(data_df, sample_size)
+    
+    paths = data_df['path'].to_numpy()
+    y = data_df['label'].to_numpy()
+    y_enc, le = encode_labels(y)
+    
+    print(f"\n✂️  Splitting data...")
+    train_idx, val_idx, test_idx = split_indices(y, splits)
+    splits = split_record(data_df, train_idx, val_idx, test_idx)
+
+    # Rows of this process, each split in one contiguous block
+    parts = [shard_rows(idx) for idx in (train_idx, val_idx, test_idx)]
+    rows = np.concatenate(parts)
+    backbone = build_backbone()
+    features, ok = compute_features(paths[rows], backbone)
+    labels = y_enc[rows]
+    blocks = np.split(np.arange(len(rows)), np.cumsum([len(p) for p in parts])[:-1])
+    train_rows, val_rows, test_rows = (_keep_loaded(block, ok[block]) for block in blocks)
+
+    # Augmented variants are only needed for the training rows
+    train_x = [features[train_rows]]
+    train_y = [labels[train_rows]]
+    for variant in range(1, variants):
+        aug_features, aug_ok = compute_features(paths[parts[0]], backbone, variant)
+        aug_rows = _keep_loaded(np.arange(len(parts[0])), aug_ok)
+        train_x.append(aug_features[aug_rows])
+        train_y.append(y_enc[parts[0]][aug_rows])
+
+    data = {
+        'train': (np.concatenate(train_x), np.concatenate(train_y)),
+        'val': (features[val_rows], labels[val_rows]),
+        'test': (features[test_rows], labels[test_rows]),
+    }
+    return data, le, splits
+
+def prepare_features(data_df, sample_size, variants=1, splits=None):
+    """Embed every image once with the frozen backbone and train the head on cached features"""
+    print("\n🧠 Using cached backbone features...")
+    data, le, splits = load_feature_splits(data_df, sample_size, variants, splits)
+    train_data = make_feature_dataset(*data['train'], training=True)
+    val_data = make_feature_dataset(*data['val'])
+    test_data = make_feature_dataset(*data['test'])
+    sizes = tuple(len(data[split][1]) for split in ('train', 'val', 'test'))
+    return train_data, val_data, test_data, le, sizes, splits
+
+def load_and_split(args, sample_size, splits=None):
+    """Steps 1-2: prepare the dataset, then load images (or build the streaming pipeline) and split"""
+    if splits is not None:
+        # Resumed run: the rows of the checkpoint, whatever the dataset holds by now
+        data_df = saved_rows(splits)
+    else:
+        data_df, title_col, image_col = load_and_prepare_data()
+        if data_df is not None and (args.find_duplicates or args.drop_duplicates):
+            data_df = report_near_duplicates(data_df, drop=args.drop_duplicates)
+    
+    if data_df is None or len(data_df) == 0:
+        print("\n❌ Training failed: No valid data")
+        return None
+    
+    if args.cache_features:
+        prepared = prepare_features(data_df, sample_size, args.feature_variants, splits)
+    elif args.streaming:
+        prepared = prepare_streaming(data_df, sample_size, splits)
+    else:
+        prepared = prepare_in_memory(data_df, sample_size, splits)
+    
+    if prepared is None:
+        print("\n❌ Training failed: Could not load images")
+    return prepared
+
+def add_new_classes():
+    """Incremental mode: extend the saved model with the classes the dataset gained since training"""
+    print("\n➕ Adding new classes to the trained model...")
+    
+    if not os.path.exists(MODEL_PATH) or not os.path.exists(ENCODER_PATH):
+        print(f"\n❌ No trained model in {MODEL_DIR}: run a full training first")
+        return 1
+    model = keras.models.load_model(MODEL_PATH)
+    with open(ENCODER_PATH, 'rb') as f:
+        old_classes = pickle.load(f).classes_
+    
+    data_df, title_col, image_col = load_and_prepare_data()
+    if data_df is None or len(data_df) == 0:
+        print("\n❌ Training failed: No valid data")
+        return 1
+    
+    new_classes = sorted(set(data_df['label']) - set(old_classes))
+    if not new_classes:
+        print("   No new classes in the dataset, the model is up to date")
+        return
+    print(f"   Known classes: {len(old_classes)}")
+    print(f"   New classes: {len(new_classes)} {new_classes[:5]}")
+    
+    # LabelEncoder keeps classes sorted, so the new ones are inserted among the old ones
+    le = LabelEncoder()
+    le.fit(list(old_classes) + new_classes)
+    
+    # New-class images plus a small replay buffer of old ones (against forgetting)
+    is_new = data_df['label'].isin(new_classes)
+    replay = data_df[~is_new].sample(frac=1, random_state=RANDOM_STATE).groupby('label').head(REPLAY_PER_CLASS)
+    subset = pd.concat([data_df[is_new], replay])
+    print(f"   Fine-tuning on {is_new.sum()} new + {len(replay)} replayed images")
+    
+    X, y = load_images_batch(subset)
+    if X is None or len(X) == 0:
+        print("\n❌ Training failed: Could not load images")
+        return 1
+    y_enc = le.transform(y).astype('int32')
+    train_idx, val_idx, test_idx = split_indices(y)
+    
+    model = extend_classifier(model, old_classes, le.classes_)
+    model.compile(
+        optimizer=keras.optimizers.Adam(INCREMENTAL_LEARNING_RATE),
+        loss='sparse_categorical_crossentropy',
+        metrics=['accuracy']
+    )
+    
+    early_stop = keras.callbacks.EarlyStopping(monitor='val_loss', patience=2, restore_best_weights=True)
+    model.fit(
+        make_array_dataset(X, y_enc, train_idx, training=True),
+        epochs=INCREMENTAL_EPOCHS,
+        validation_data=make_array_dataset(X, y_enc, val_idx),
+        callbacks=[early_stop, epoch_order()],
+        verbose=1
+    )
+    
+    print("\n📊 Evaluating...")
+    test_new = np.isin(y[test_idx], new_classes)
+    for name, idx in (('New classes', test_idx[test_new]), ('Replayed classes', test_idx[~test_new])):
+        if len(idx):
+            loss, accuracy = model.evaluate(make_array_dataset(X, y_enc, idx), verbose=0)
+            print(f"   {name} accuracy: {accuracy*100:.2f}% ({len(idx)} images)")
+    
+    save_model_and_artifacts(model, le, le.classes_, {'added_classes': [str(c) for c in new_classes]})
+
+def print_phase_times():
+    """Wall-clock time of each pipeline phase of this run"""
+    totals = telemetry.phase_totals()
+    if not totals:
+        return
+    print(f"\n⏱️  Time by phase:")
+    for name, seconds in totals.items():
+        print(f"   {name:<17} {seconds:8.1f}s")
+
+def parse_args(argv=None):
+    """Command-line options"""
+    import argparse
+    parser = argparse.ArgumentParser(description="Train the Food-IA recognition model")
+    parser.add_argument('--streaming', action='store_true',
+                        help="Stream images from disk with tf.data instead of loading them into RAM")
+    parser.add_argument('--records', metavar='DIR', nargs='?', const=RECORDS_DIR,
+                        help=f"Stream from sharded TFRecords written by export_records.py (default {RECORDS_DIR})")
+    parser.add_argument('--cache-features', action='store_true',
+                        help="Embed images once with the frozen backbone (cached on disk) and train only the head")
+    parser.add_argument('--feature-variants', type=int, default=1,
+                        help="Embedded copies of each training image with --cache-features (1 = no augmentation)")
+    parser.add_argument('--progressive-resize', action='store_true',
+                        help="Train the first epochs on smaller images (RESIZE_SCHEDULE), then at full size")
+    parser.add_argument('--sample-size', type=int, default=SAMPLE_SIZE,
+                        help="Number of images to use (0 = all images)")
+    parser.add_argument('--distributed', action='store_true',
+                        help="Data-parallel training across the workers in TF_CONFIG (see launch_distributed.py)")
+    parser.add_argument('--threads', type=int, default=0,
+                        help="TensorFlow intra-op threads for this process (0 = TensorFlow default)")
+    parser.add_argument('--prepare-only', action='store_true',
+                        help="Only prepare the data and fill the caches, then exit")
+    parser.add_argument('--add-classes', action='store_true',
+                        help="Extend the saved model with new dataset classes (fine-tunes on them + a replay buffer)")
+    parser.add_argument('--resume', action='store_true',
+                        help=f"Continue the last interrupted run from its checkpoint in {CHECKPOINT_DIR}")
+    parser.add_argument('--telemetry', metavar='PATH', nargs='?', const=TELEMETRY_PATH,
+                        help=f"Append phase and per-step timings, images/s and peak RSS as JSON lines (default {TELEMETRY_PATH})")
+    parser.add_argument('--find-duplicates', action='store_true',
+                        help=f"Report near-duplicate images to {DUPLICATES_REPORT_PATH}")
+    parser.add_argument('--drop-duplicates', action='store_true',
+                        help="Report near-duplicate images and drop them before training")
+    return parser.parse_args(argv)
+
+def main(argv=None):
     """Main training pipeline"""
+    argv = sys.argv[1:] if argv is None else list(argv)
+    args = parse_args(argv)
+    
+    # The strategy has to exist before any other TensorFlow op
+    strategy = None
+    if args.distributed:
+        strategy = setup_distributed(args.threads)
+    elif args.threads:
+        tf.config.threading.set_intra_op_parallelism_threads(args.threads)
+    
     print("╔════════════════════════════════════════════════════════════════╗")
     print("║        🍽️  FOOD-IA: Model Training Pipeline                  ║")
     print("╚════════════════════════════════════════════════════════════════╝")
     
+    resume = None
+    if args.resume:
+        resume = checkpoints.load_checkpoint(CHECKPOINT_DIR)
+        if resume is None:
+            print(f"\n❌ No checkpoint to resume in {CHECKPOINT_DIR}")
+            return 1
+        # Same data options as the interrupted run
+        argv = resume['argv']
+        args = parse_args(argv)
+    sample_size = args.sample_size or None
+
+    if args.distributed and (args.streaming or args.add_classes):
+        # Unreadable files are only found while streaming: the workers would run different step counts
+        print("\n❌ --distributed works with the in-memory, --cache-features and --records inputs "
+              "(export the dataset with export_records.py instead of --streaming)")
+        return 1
+    
     print(f"\n⚙️  Configuration:")
     print(f"   Image size: {IMAGE_SIZE}")
     print(f"   Batch size: {BATCH_SIZE}")
     print(f"   Epochs: {EPOCHS}")
+    print(f"   Sample size: {sample_size or 'all images'}")
+    if args.records:
+        input_mode = f'sharded records ({args.records})'
+    elif args.cache_features:
+        input_mode = f'cached features ({args.feature_variants} variant(s))'
+    else:
+        input_mode = 'streaming (tf.data)' if args.streaming else 'in-memory'
+    print(f"   Input mode: {input_mode}")
+    if args.progressive_resize:
+        if args.cache_features and not args.records:
+            # Embeddings are cached at IMAGE_SIZE
+            print("   Progressive resize: ignored with --cache-features")
+        else:
+            enable_progressive_resize()
+            print("   Progressive resize: " + ", ".join(
+                f"{w}x{h} from epoch {epoch + 1}" for epoch, (w, h) in RESIZE_SCHEDULE))
+    if strategy is not None:
+        print(f"   Distributed: worker {_worker[0] + 1}/{_worker[1]}, global batch {global_batch_size()}")
     print(f"   Min images per class: {MIN_IMAGES_PER_CLASS}")
+    if resume:
+        print(f"   Resuming: epoch {resume['epoch'] + 1}, step {resume['step']} (checkpoint {resume['saved']})")
     
-    # Step 1: Load and prepare data
     create_model_directory()
-    data_df, title_col, image_col = load_and_prepare_data()
+    if args.telemetry:
+        telemetry_path = args.telemetry
+        if not is_chief():
+            root, ext = os.path.splitext(telemetry_path)
+            telemetry_path = f'{root}_worker{_worker[0] + 1}{ext}'
+        telemetry.start(
+            telemetry_path,
+            argv=argv,
+            input_mode=input_mode,
+            image_size=list(IMAGE_SIZE),
+            batch_size=global_batch_size(),
+            epochs=EPOCHS,
+            sample_size=sample_size,
+            workers=_worker[1],
+        )
+        print(f"   Telemetry: {telemetry_path}")
     
-    if data_df is None or len(data_df) == 0:
-        print("\n❌ Training failed: No valid data")
-        return
+    if args.add_classes:
+        return add_new_classes()
     
-    # Step 2: Load images (use sample for faster training on first run)
-    # Set to None to use all images (slower but more accurate)
-    SAMPLE_SIZE = 5000  # Use 5000 images for faster initial training
-    X, y = load_images_batch(data_df, sample_size=SAMPLE_SIZE)
+    if args.records:
+        # Steps 1-2: the records already hold the filtered, split dataset
+        prepared = prepare_records(args.records)
+    elif resume and resume['splits'] is None:
+        print(f"\n❌ The checkpoint in {CHECKPOINT_DIR} has no saved split to resume from: start a new run")
+        return 1
+    else:
+        prepared = load_and_split(args, sample_size, resume['splits'] if resume else None)
     
-    if X is None or len(X) == 0:
-        print("\n❌ Training failed: Could not load images")
+    if prepared is None:
+        return 1
+    
+    train_data, val_data, test_data, le, split_sizes, splits = prepared
+    if args.prepare_only:
+        # Also a good moment to drop cache entries of deleted or modified images
+        pruned = sum(prune_caches().values())
+        print(f"\n✅ Data prepared and cached ({pruned} stale cache entries pruned)")
         return
+    if not resume and is_chief():
+        checkpoints.reset(CHECKPOINT_DIR)
+        if splits is not None:
+            checkpoints.save_splits(CHECKPOINT_DIR, splits)
+    print(f"   Training set: {split_sizes[0]} images")
+    print(f"   Validation set: {split_sizes[1]} images")
+    print(f"   Test set: {split_sizes[2]} images")
     
-    # Step 3: Encode labels
+    # Step 3: Labels (encoded while preparing the splits)
     print(f"\n🏷️  Encoding labels...")
-    unique_classes = np.unique(y)
+    unique_classes = le.classes_
     num_classes = len(unique_classes)
     print(f"   Classes: {num_classes}")
     print(f"   Sample classes: {unique_classes[:5]}")
     
-    # Step 4: Split data
-    print(f"\n✂️  Splitting data...")
-    # First split: training+validation vs test
-    X_temp, X_test, y_temp, y_test = train_test_split(
-        X, y, test_size=TEST_SPLIT, random_state=RANDOM_STATE, stratify=y
-    )
-    
-    # Second split: training vs validation
-    X_train, X_val, y_train, y_val = train_test_split(
-        X_temp, y_temp, test_size=VALIDATION_SPLIT, random_state=RANDOM_STATE, stratify=y_temp
-    )
-    
-    print(f"   Training set: {len(X_train)} images")
-    print(f"   Validation set: {len(X_val)} images")
-    print(f"   Test set: {len(X_test)} images")
-    
-    # Encode labels
-    y_train_enc, y_test_enc, le = encode_labels(y_train, y_test)
-    y_val_enc = le.transform(y_val)
-    
-    # Step 5: Build model
-    model = build_model(num_classes)
+    # Step 4: Build model (only the head when training on cached features)
+    with strategy.scope() if strategy is not None else contextlib.nullcontext():
+        if resume:
+            model = keras.models.load_model(resume['model_path'])
+        elif args.cache_features and not args.records:
+            model = build_head(num_classes)
+        else:
+            model = build_model(num_classes)
     
-    # Step 6: Train model
+    # Step 5: Train model
     try:
-        history = train_model(model, X_train, y_train_enc, X_val, y_val_enc)
+        if resume and resume['finished']:
+            print("\n✅ Training already finished in the checkpoint")
+        else:
+            metadata = {'argv': [a for a in argv if a != '--resume'], 'classes': [str(c) for c in unique_classes]}
+            # Record shuffles are not epoch-keyed, so they resume from epoch boundaries only
+            with telemetry.phase('train'):
+                train_model(model, train_data, val_data, resume, metadata, step_checkpoints=not args.records,
+                            strategy=strategy)
         
-        # Step 7: Evaluate
-        accuracy = evaluate_model(model, X_test, y_test_enc)
+        # Step 6: Evaluate
+        with telemetry.phase('evaluate'):
+            accuracy = evaluate_model(model, test_data, strategy)
+        telemetry.record('test', accuracy=float(accuracy))
         
-        # Step 8: Save artifacts
-        save_model_and_artifacts(model, le, unique_classes)
+        if args.cache_features and not args.records:
+            # Put the trained head back on the backbone so the saved model takes images
+            model = build_model(num_classes, head=model)
+        
+        # Step 7: Save artifacts
+        if not is_chief():
+            print(f"\n✅ Worker {_worker[0] + 1} done (artifacts are saved by worker 1)")
+            return
+        with telemetry.phase('save'):
+            save_model_and_artifacts(model, le, unique_classes, {
+                'argv': argv,
+                'input_mode': input_mode,
+                'test_accuracy': float(accuracy),
+                'images': {'train': int(split_sizes[0]), 'val': int(split_sizes[1]), 'test': int(split_sizes[2])},
+            })
+        print_phase_times()
         
         print(f"\n╔════════════════════════════════════════════════════════════════╗")
         print(f"║                   ✨ TRAINING COMPLETE ✨                     ║")
@@ -377,10 +1504,13 @@ def main():
         
     except KeyboardInterrupt:
         print("\n\n⚠️  Training interrupted by user")
+        print(f"   Continue from the last checkpoint with: python train_model.py --resume")
+        return 1
     except Exception as e:
         print(f"\n❌ Training failed: {e}")
         import traceback
         traceback.print_exc()
+        return 1
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -72,6 +72,19 @@ def check_model_artifacts():
 def count_images():
     """Count images in Food Images folder"""
     print("\n📸 Dataset:")
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+    from manifest_store import MANIFEST_DB, ManifestStore
+    
+    # Indexed count from the manifest kept by train_model.py (no directory scan)
+    if os.path.isfile(MANIFEST_DB):
+        store = ManifestStore(MANIFEST_DB)
+        total = store.count_images()
+        valid, missing, failed = store.count_labelled()
+        store.close()
+        print(f"   ✅ Images found: {total} (manifest {MANIFEST_DB})")
+        print(f"   ✅ Labelled & readable: {valid}, missing from folder: {missing}, failed to decode: {failed}")
+        return total > 0
+    
     img_dir = '.venv/data/Food Images'
     
     if os.path.isdir(img_dir):
@@ -83,6 +96,21 @@ def count_images():
         print(f"   ❌ Food Images folder not found")
         return False
 
+def check_image_cache():
+    """Show the preprocessed-image cache built by train_model.py / load_food_data"""
+    print("\n🗄️  Image Cache:")
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+    from image_cache import CACHE_DIR, cache_summary
+    
+    summary = cache_summary(CACHE_DIR)
+    if not summary:
+        print(f"   ⏳ No cache yet in {CACHE_DIR} (built on the next training run)")
+        return False
+    
+    for name, entries, size in summary:
+        print(f"   ✅ {name:20} - {entries} images, {size / 1024 ** 2:.1f} MB")
+    return True
+
 def check_python_env():
     """Check Python environment"""
     print("\n🐍 Python Environment:")
@@ -122,6 +150,7 @@ def main():
     files_ok = check_files()
     model_trained = check_model_artifacts()
     data_ok = count_images()
+    check_image_cache()
     check_python_env()
     
     print("\n" + "="*64)